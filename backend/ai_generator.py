@@ -1,6 +1,71 @@
-from typing import Any, Dict, List, Optional
-
-import anthropic
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from request_sources import collect_sources, record_sources
+from response_cache import (
+    ResponseCache,
+    SemanticResponseCache,
+    SingleFlight,
+    tools_signature,
+)
+from usage_tracker import UsageTracker
+
+if TYPE_CHECKING:
+    import anthropic
+
+# Process-wide clients keyed by API key so HTTP keep-alive connections are reused
+_CLIENTS: Dict[str, "anthropic.Anthropic"] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def __getattr__(name: str) -> Any:
+    """Import the Anthropic SDK on first access instead of at module load"""
+    if name == "anthropic":
+        import anthropic
+
+        globals()["anthropic"] = anthropic
+        return anthropic
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@lru_cache(maxsize=1024)
+def _history_block(conversation_history: str) -> Dict[str, Any]:
+    """Build the system block for a history snapshot, reused across identical turns"""
+    return {
+        "type": "text",
+        "text": f"Previous conversation:\n{conversation_history}",
+    }
+
+
+def get_client(api_key: str) -> "anthropic.Anthropic":
+    """Return the shared Anthropic client for an API key, creating it on first use"""
+    client = _CLIENTS.get(api_key)
+    if client is None:
+        with _CLIENTS_LOCK:
+            client = _CLIENTS.get(api_key)
+            if client is None:
+                # Deferred so importing this module doesn't load the SDK
+                import anthropic
+                import httpx
+
+                client = anthropic.Anthropic(
+                    api_key=api_key,
+                    http_client=anthropic.DefaultHttpxClient(
+                        limits=httpx.Limits(
+                            max_keepalive_connections=20, max_connections=40
+                        )
+                    ),
+                )
+                _CLIENTS[api_key] = client
+    return client
 
 
 class AIGenerator:
@@ -44,13 +109,81 @@ All responses must be:
 4. **Example-supported** - Include relevant examples when they aid understanding
 Provide only the direct answer to what was asked.
 """
-
-    def __init__(self, api_key: str, model: str):
-        self.client = anthropic.Anthropic(api_key=api_key)
+    # Interned so every request shares one prompt object
+    SYSTEM_PROMPT = sys.intern(SYSTEM_PROMPT)
+
+    # Queries that may need a second, dependent tool round (see Tool Selection)
+    MULTI_STEP_QUERY_PATTERN = re.compile(
+        r"\b(compare|comparison|versus|vs\.?|difference between|and also|"
+        r"similar|same concept|across courses)\b",
+        re.IGNORECASE,
+    )
+
+    # "lesson N of <course> with <topic>" queries need both the outline and a search.
+    # Titles can contain "with", "and" or "to", so the course is matched against
+    # the catalog and only the text after it is parsed for the topic
+    PREFETCH_QUERY_PATTERN = re.compile(
+        r"\blesson\s+\d+\s+of\s+(?:the\s+)?(?P<rest>.+)", re.IGNORECASE
+    )
+    PREFETCH_TOPIC_PATTERN = re.compile(
+        r"\s+(?:course\s+)?(?:with|and|to)\s+(?P<topic>[^?.!]+)", re.IGNORECASE
+    )
+
+    # Tool output beyond this many characters is trimmed before the final call
+    MAX_TOOL_RESULT_CHARS = 4000
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        cache_size: int = 512,
+        cache_ttl_seconds: Optional[float] = None,
+        embedding_function: Optional[Callable[[List[str]], Any]] = None,
+        semantic_cache_threshold: float = 0.95,
+        parallel_prefetch: bool = False,
+        course_titles: Optional[Callable[[], List[str]]] = None,
+        tool_max_workers: Optional[int] = None,
+        max_rpm: Optional[int] = None,
+        max_tpm: Optional[int] = None,
+    ):
+        self.client = get_client(api_key)
         self.model = model
+        self.parallel_prefetch = parallel_prefetch
+        self.course_titles = course_titles
+
+        # Dedicated bounded pool for running a round's tool calls (ChromaDB lookups)
+        self._tool_executor = ThreadPoolExecutor(
+            max_workers=tool_max_workers or min(8, os.cpu_count() or 1),
+            thread_name_prefix="tool",
+        )
+
+        # Memoize answers to repeated identical requests
+        self.response_cache = ResponseCache(cache_size, cache_ttl_seconds)
+
+        # Optionally reuse answers for paraphrased queries
+        self.semantic_cache = (
+            SemanticResponseCache(
+                embedding_function,
+                semantic_cache_threshold,
+                cache_size,
+                cache_ttl_seconds,
+            )
+            if embedding_function is not None
+            else None
+        )
+
+        # Collapses concurrent identical requests into one execution
+        self._inflight = SingleFlight()
+
+        # Token usage accounting and optional rate limiting
+        self.usage_tracker = UsageTracker(max_rpm, max_tpm)
 
         # Pre-build base API parameters
-        self.base_params = {"model": self.model, "temperature": 0, "max_tokens": 800}
+        self.base_params: Dict[str, Any] = {
+            "model": self.model,
+            "temperature": 0,
+            "max_tokens": 800,
+        }
 
     def generate_response(
         self,
@@ -58,15 +191,25 @@ Provide only the direct answer to what was asked.
         conversation_history: Optional[str] = None,
         tools: Optional[List] = None,
         tool_manager=None,
+        force_single_round: Optional[bool] = None,
+        user_query: Optional[str] = None,
     ) -> str:
         """
         Generate AI response with up to 2 rounds of sequential tool usage.
 
+        The sources found by the searches are recorded for the caller's
+        collect_sources block, also when an identical in-flight request
+        answered it.
+
         Args:
             query: The user's question or request
             conversation_history: Previous messages for context
             tools: Available tools the AI can use
             tool_manager: Manager to execute tools
+            force_single_round: Withhold tools after the first round; when None,
+                decided by whether the query looks multi-step
+            user_query: The user's own words when query wraps them in a
+                prompt; semantic cache matching uses it instead of query
 
         Returns:
             Generated response as string
@@ -77,38 +220,225 @@ Provide only the direct answer to what was asked.
         - Tool execution fails
         """
 
-        # Build system content efficiently - avoid string ops when possible
-        system_content = (
-            f"{self.SYSTEM_PROMPT}\n\nPrevious conversation:\n{conversation_history}"
-            if conversation_history
-            else self.SYSTEM_PROMPT
+        # Identical requests arriving concurrently share one API round trip;
+        # the same key then serves the response cache
+        cache_key = ResponseCache.make_key(query, conversation_history, tools)
+
+        def run() -> Tuple[str, List[Any]]:
+            # Sources are returned with the answer so joined callers get them too
+            with collect_sources() as sources:
+                answer = self._answer(
+                    query,
+                    conversation_history,
+                    tools,
+                    tool_manager,
+                    force_single_round,
+                    user_query,
+                    cache_key,
+                )
+            return answer, sources
+
+        answer, sources = self._inflight.do(cache_key, run)
+        if sources:
+            record_sources(sources)
+        return answer
+
+    def generate_response_stream(
+        self,
+        query: str,
+        conversation_history: Optional[str] = None,
+        tools: Optional[List] = None,
+        tool_manager=None,
+        force_single_round: Optional[bool] = None,
+        user_query: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Generate AI response like generate_response, streaming the final answer.
+
+        Tool rounds run without streaming since a tool_use response has nothing
+        to show, and all finish before the first chunk is yielded; the synthesis
+        call after the rounds streams its text as it is generated. Answers available without a synthesis call (cache hits,
+        direct answers, tool failures) are yielded as a single chunk.
+
+        Args:
+            query: The user's question or request
+            conversation_history: Previous messages for context
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+            force_single_round: See generate_response
+            user_query: See generate_response
+
+        Yields:
+            Chunks of the generated response text
+        """
+        answer, final_params = self._run_tool_rounds(
+            query,
+            conversation_history,
+            tools,
+            tool_manager,
+            force_single_round,
+            user_query,
+        )
+        if answer is not None:
+            yield answer
+            return
+
+        self._acquire_rate_limit(final_params)
+        with self.client.messages.stream(**final_params) as stream:
+            yield from stream.text_stream
+            self.usage_tracker.record(stream.get_final_message().usage)
+
+    def _answer(self, *args, **kwargs) -> str:
+        """Run _run_tool_rounds with these arguments, then synthesize if needed"""
+        answer, final_params = self._run_tool_rounds(*args, **kwargs)
+        if answer is None:
+            answer = self._create_message(final_params).content[0].text
+        return answer
+
+    def _run_tool_rounds(
+        self,
+        query: str,
+        conversation_history: Optional[str],
+        tools: Optional[List],
+        tool_manager,
+        force_single_round: Optional[bool] = None,
+        user_query: Optional[str] = None,
+        cache_key: Optional[str] = None,
+        first_response: Any = None,
+    ) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Run cache lookups and up to 2 rounds of sequential tool usage.
+
+        Args:
+            query: The user's question or request
+            conversation_history: Previous messages for context
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+            force_single_round: Withhold tools after the first round
+            user_query: Text to match in the semantic cache; defaults to query
+            cache_key: Precomputed ResponseCache key for these arguments
+            first_response: Round 1 response already generated for the query
+                (e.g. by a batch); the caches are skipped and rounds continue
+                from its tool calls
+
+        Returns:
+            Tuple of (answer, final call parameters). The answer is set when
+            no synthesis call is needed; otherwise it is None and the
+            parameters describe the final no-tools call to make.
+        """
+
+        # Serve repeated identical requests from the response cache
+        if cache_key is None:
+            cache_key = ResponseCache.make_key(query, conversation_history, tools)
+        cached_response = (
+            self.response_cache.get(cache_key) if first_response is None else None
         )
+        if cached_response is not None:
+            return cached_response, {}
+
+        # Fall back to a semantic match; history-dependent answers are never reused.
+        # The user's own words are embedded, since a shared prompt prefix would
+        # make unrelated short questions look alike. Answers given with other
+        # tools are kept apart, as in the response cache key
+        query_vector = None
+        partition = tools_signature(tools)
+        if (
+            self.semantic_cache is not None
+            and not conversation_history
+            and first_response is None
+        ):
+            query_vector = self.semantic_cache.encode(user_query or query)
+            cached_response = self.semantic_cache.lookup(query_vector, partition)
+            if cached_response is not None:
+                return cached_response, {}
+
+        # Static prompt is cached server-side; only the history block varies
+        system_content = self._build_system_content(conversation_history)
+
+        # Mark the last tool so the whole tools array is cached as a prefix
+        if tools:
+            tools = self._with_cached_tools(tools)
+
+        # Only multi-step queries keep tools available after the first round
+        if force_single_round is None:
+            force_single_round = not self.MULTI_STEP_QUERY_PATTERN.search(query)
 
         # Initialize conversation state for sequential tool calling
-        messages = [{"role": "user", "content": query}]
+        # The query is cached too, so later rounds reuse system + tools + query
+        messages: List[Dict[str, Any]] = [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": query,
+                        "cache_control": {"type": "ephemeral"},
+                    }
+                ],
+            }
+        ]
         round_count = 0
         max_rounds = 2
 
+        # Build API parameters once; the messages list grows in place each round
+        api_params: Dict[str, Any] = self.base_params.copy()
+        api_params["messages"] = messages
+        api_params["system"] = system_content
+
+        # Add tools if available
+        if tools:
+            api_params["tools"] = tools
+            api_params["tool_choice"] = {"type": "auto"}
+
+        # Clear outline+content queries run both lookups up front as round 1
+        prefetch_calls = None
+        if first_response is None:
+            prefetch_calls = self._should_parallel_prefetch(query, tools, tool_manager)
+        if prefetch_calls:
+            tool_execution_result = self._execute_tools_for_round(
+                SimpleNamespace(content=prefetch_calls), tool_manager, 1
+            )
+            if tool_execution_result is not None:
+                messages.append(
+                    {
+                        "role": "assistant",
+                        "content": [
+                            {
+                                "type": "tool_use",
+                                "id": call.id,
+                                "name": call.name,
+                                "input": call.input,
+                            }
+                            for call in prefetch_calls
+                        ],
+                    }
+                )
+                messages.append({"role": "user", "content": tool_execution_result})
+                round_count = 1
+
         # Sequential tool calling loop
         while round_count < max_rounds:
-            # Prepare API call parameters with tools available (make a copy of messages)
-            api_params = {
-                **self.base_params,
-                "messages": messages.copy(),
-                "system": system_content,
-            }
-
-            # Add tools if available
-            if tools:
-                api_params["tools"] = tools
-                api_params["tool_choice"] = {"type": "auto"}
+            # Simple queries rarely need a second lookup; answer from round 1 results
+            if round_count == 1 and force_single_round:
+                api_params.pop("tools", None)
+                api_params.pop("tool_choice", None)
 
-            # Get response from Claude
-            response = self.client.messages.create(**api_params)
+            # Get response from Claude, unless round 1 was already generated
+            if first_response is not None:
+                response, first_response = first_response, None
+            else:
+                response = self._create_message(api_params)
 
             # Termination condition: no tool use
             if response.stop_reason != "tool_use":
-                return response.content[0].text
+                # Only cache answers that ran no tools, since tool runs also
+                # record the sources shown alongside the answer
+                answer = response.content[0].text
+                if round_count == 0:
+                    self.response_cache.set(cache_key, answer)
+                    if self.semantic_cache is not None and query_vector is not None:
+                        self.semantic_cache.add(query_vector, answer, partition)
+                return answer, {}
 
             # Handle tool execution for this round
             tool_execution_result = self._execute_tools_for_round(
@@ -117,24 +447,268 @@ Provide only the direct answer to what was asked.
 
             # Termination condition: tool execution failed
             if tool_execution_result is None:
-                return "I encountered an error while processing your request."
+                return "I encountered an error while processing your request.", {}
 
             # Add AI response and tool results to conversation
-            messages.append({"role": "assistant", "content": response.content})
+            # Store plain block dicts so the SDK doesn't re-serialize models per call
+            messages.append(
+                {
+                    "role": "assistant",
+                    "content": [
+                        block.model_dump(exclude_none=True)
+                        for block in response.content
+                    ],
+                }
+            )
             messages.append({"role": "user", "content": tool_execution_result})
 
             round_count += 1
 
-        # Final API call after max rounds (without tools to force completion)
-        final_params = {
-            **self.base_params,
-            "messages": messages.copy(),
-            "system": system_content,
-            # No tools - force Claude to provide final answer
-        }
+        # Only synthesis remains, so trim oversized tool output before the final call
+        self._compact_tool_results(messages)
 
-        final_response = self.client.messages.create(**final_params)
-        return final_response.content[0].text
+        # Final API call after max rounds reuses the round parameters; tools are
+        # always omitted here so Claude has to synthesize an answer
+        api_params.pop("tools", None)
+        api_params.pop("tool_choice", None)
+        return None, api_params
+
+    def generate_response_batch(
+        self,
+        queries: List[str],
+        tools: Optional[List] = None,
+        tool_manager=None,
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 60.0,
+        timeout: Optional[float] = 3600.0,
+    ) -> List[str]:
+        """
+        Generate responses for many queries via the Message Batches API.
+
+        Intended for offline workloads (evaluation runs, cache pre-warming) where
+        the batch discount matters more than latency. Every request shares the
+        same cached system and tools prefix. A batch returns a single response
+        per request, so when that response calls tools they are executed and
+        the remaining rounds run synchronously, as in generate_response.
+
+        Args:
+            queries: The user questions to answer
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools; required when tools are given
+            poll_interval: Initial delay in seconds between status checks
+            max_poll_interval: Upper bound for the exponential polling backoff
+            timeout: Seconds to wait for the batch before cancelling it and
+                raising TimeoutError; None waits until it ends
+
+        Returns:
+            Generated responses in the same order as queries
+        """
+        if tools and tool_manager is None:
+            raise ValueError("tool_manager is required when tools are given")
+        if not queries:
+            return []
+
+        system_content = self._build_system_content()
+        shared_params: Dict[str, Any] = self.base_params.copy()
+        shared_params["system"] = system_content
+        if tools:
+            shared_params["tools"] = self._with_cached_tools(tools)
+            shared_params["tool_choice"] = {"type": "auto"}
+
+        requests: List[Any] = []
+        for index, query in enumerate(queries):
+            params = shared_params.copy()
+            params["messages"] = [
+                {"role": "user", "content": [{"type": "text", "text": query}]}
+            ]
+            requests.append({"custom_id": f"query-{index}", "params": params})
+
+        batch = self.client.messages.batches.create(requests=requests)
+
+        # Poll with exponential backoff until the batch has finished processing
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = poll_interval
+        while batch.processing_status != "ended":
+            sleep_for = delay
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.client.messages.batches.cancel(batch.id)
+                    raise TimeoutError(
+                        f"Message batch {batch.id} did not end within {timeout}s"
+                    )
+                sleep_for = min(delay, remaining)
+            time.sleep(sleep_for)
+            delay = min(delay * 2, max_poll_interval)
+            batch = self.client.messages.batches.retrieve(batch.id)
+
+        error_message = "I encountered an error while processing your request."
+        responses = [error_message] * len(queries)
+        for entry in self.client.messages.batches.results(batch.id):
+            index = int(entry.custom_id.rsplit("-", 1)[1])
+            if entry.result.type != "succeeded":
+                continue
+
+            message = entry.result.message
+            self.usage_tracker.record(message.usage, rate_limited=False)
+            if message.stop_reason == "tool_use":
+                # Later rounds depend on the tool results; continue synchronously
+                # from this response instead of asking again
+                responses[index] = self._answer(
+                    queries[index], None, tools, tool_manager, first_response=message
+                )
+                continue
+
+            responses[index] = "".join(
+                block.text for block in message.content if block.type == "text"
+            )
+
+        return responses
+
+    def close(self):
+        """Stop the tool worker threads once the generator is no longer used"""
+        self._tool_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _create_message(self, params: Dict[str, Any]):
+        """Call messages.create within the rate limits and record its token usage"""
+        self._acquire_rate_limit(params)
+        response = self.client.messages.create(**params)
+        self.usage_tracker.record(getattr(response, "usage", None))
+        return response
+
+    def _acquire_rate_limit(self, params: Dict[str, Any]):
+        """Wait for rate-limit capacity using a rough size estimate of the request"""
+        if not self.usage_tracker.limited:
+            return
+
+        # Roughly 4 characters per token is close enough for pacing
+        est_input_tokens = (
+            len(str(params.get("system", ""))) + len(str(params["messages"]))
+        ) // 4
+        self.usage_tracker.acquire(est_input_tokens, params.get("max_tokens", 0))
+
+    def _build_system_content(
+        self, conversation_history: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Build the system prompt as content blocks for prompt caching.
+
+        The static SYSTEM_PROMPT carries a cache_control marker so it is
+        served from Anthropic's prompt cache; the conversation history is
+        appended as a separate, uncached block.
+
+        Args:
+            conversation_history: Previous messages for context
+
+        Returns:
+            List of system content blocks
+        """
+        system_content: List[Dict[str, Any]] = [
+            {
+                "type": "text",
+                "text": self.SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+        if conversation_history:
+            system_content.append(_history_block(conversation_history))
+        return system_content
+
+    def _compact_tool_results(self, messages: List[Dict[str, Any]]):
+        """
+        Trim tool results longer than MAX_TOOL_RESULT_CHARS in place.
+
+        Search output is a blank-line separated list of hits ordered by
+        relevance, so whole leading hits are kept until the budget is spent.
+
+        Args:
+            messages: Conversation messages to compact
+        """
+        limit = self.MAX_TOOL_RESULT_CHARS
+        for message in messages:
+            if message["role"] != "user" or not isinstance(message["content"], list):
+                continue
+
+            for block in message["content"]:
+                content = block.get("content")
+                if block.get("type") != "tool_result" or not isinstance(content, str):
+                    continue
+                if len(content) <= limit:
+                    continue
+
+                kept: List[str] = []
+                used = 0
+                for hit in content.split("\n\n"):
+                    if kept and used + len(hit) + 2 > limit:
+                        break
+                    kept.append(hit)
+                    used += len(hit) + 2
+                block["content"] = "\n\n".join(kept)[:limit]
+
+    def _should_parallel_prefetch(
+        self, query: str, tools: Optional[List], tool_manager
+    ) -> Optional[List[SimpleNamespace]]:
+        """
+        Decide whether the outline and content tools can be run before asking Claude.
+
+        Only opted-in, multi-step queries that name a course from the catalog
+        are prefetched, since the model may get no tool round to correct a
+        wrong guess.
+
+        Args:
+            query: The user's question or request
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+
+        Returns:
+            Synthetic tool_use blocks to execute, or None if no prefetch applies
+        """
+        if not (self.parallel_prefetch and self.course_titles):
+            return None
+        if not (tools and tool_manager):
+            return None
+
+        tool_names = {tool.get("name") for tool in tools}
+        if not {"get_course_outline", "search_course_content"} <= tool_names:
+            return None
+
+        if not self.MULTI_STEP_QUERY_PATTERN.search(query):
+            return None
+
+        match = self.PREFETCH_QUERY_PATTERN.search(query)
+        if not match:
+            return None
+
+        # Prefer the longest title so one that extends another wins
+        rest = match.group("rest")
+        for title in sorted(self.course_titles(), key=len, reverse=True):
+            if not rest.lower().startswith(title.lower()):
+                continue
+            topic_match = self.PREFETCH_TOPIC_PATTERN.match(rest, len(title))
+            if not topic_match:
+                return None
+
+            return [
+                SimpleNamespace(
+                    type="tool_use",
+                    id="prefetch_outline",
+                    name="get_course_outline",
+                    input={"course_title": title},
+                ),
+                SimpleNamespace(
+                    type="tool_use",
+                    id="prefetch_search",
+                    name="search_course_content",
+                    input={"query": topic_match.group("topic").strip()},
+                ),
+            ]
+
+        return None
+
+    @staticmethod
+    def _with_cached_tools(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Copy tools with the last one marked so the array is cached as a prefix"""
+        return [*tools[:-1], {**tools[-1], "cache_control": {"type": "ephemeral"}}]
 
     def _execute_tools_for_round(self, response, tool_manager, round_number: int):
         """
@@ -151,40 +725,56 @@ Provide only the direct answer to what was asked.
         if not tool_manager:
             return None
 
-        tool_results = []
+        tool_uses = [block for block in response.content if block.type == "tool_use"]
+        if not tool_uses:
+            return None
 
-        for content_block in response.content:
-            if content_block.type == "tool_use":
-                try:
-                    # Execute the tool
-                    tool_result = tool_manager.execute_tool(
-                        content_block.name, **content_block.input
-                    )
+        # Independent tool calls from the same round run concurrently, each in
+        # a copy of this context so the sources land in the calling request
+        if len(tool_uses) == 1:
+            outputs = [self._run_tool(tool_manager, tool_uses[0])]
+        else:
+            futures = [
+                self._tool_executor.submit(
+                    copy_context().run, self._run_tool, tool_manager, block
+                )
+                for block in tool_uses
+            ]
+            outputs = [future.result() for future in futures]
+
+        return [
+            {
+                "type": "tool_result",
+                "tool_use_id": content_block.id,
+                "content": output,
+            }
+            for content_block, output in zip(tool_uses, outputs)
+        ]
 
-                    # Validate result
-                    if not tool_result or not isinstance(tool_result, str):
-                        tool_result = f"Tool {content_block.name} returned no results"
+    def _run_tool(self, tool_manager, content_block) -> str:
+        """
+        Execute a single tool_use block, converting failures into result text.
 
-                    tool_results.append(
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": content_block.id,
-                            "content": tool_result,
-                        }
-                    )
+        Args:
+            tool_manager: Manager to execute tools
+            content_block: The tool_use block to execute
 
-                except Exception as e:
-                    # Create error result but continue with other tools
-                    error_message = f"Error executing {content_block.name}: {str(e)}"
-                    tool_results.append(
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": content_block.id,
-                            "content": error_message,
-                        }
-                    )
+        Returns:
+            Tool output, or an error message if execution failed
+        """
+        try:
+            # Execute the tool
+            tool_result = tool_manager.execute_tool(
+                content_block.name, **content_block.input
+            )
 
-        return tool_results if tool_results else None
+            # Tools return str by contract; the type check is skipped under -O
+            assert isinstance(tool_result, (str, type(None))), type(tool_result)
+            return tool_result or f"Tool {content_block.name} returned no results"
+
+        except Exception as e:
+            # Report the error but let the other tools in the round continue
+            return f"Error executing {content_block.name}: {str(e)}"
 
     def _handle_tool_execution(
         self, initial_response, base_params: Dict[str, Any], tool_manager
@@ -201,7 +791,7 @@ Provide only the direct answer to what was asked.
             Final response text after tool execution
         """
         # Start with existing messages
-        messages = base_params["messages"].copy()
+        messages = list(base_params["messages"])
 
         # Add AI's tool use response
         messages.append({"role": "assistant", "content": initial_response.content})
@@ -227,12 +817,10 @@ Provide only the direct answer to what was asked.
             messages.append({"role": "user", "content": tool_results})
 
         # Prepare final API call without tools
-        final_params = {
-            **self.base_params,
-            "messages": messages,
-            "system": base_params["system"],
-        }
+        final_params = self.base_params.copy()
+        final_params["messages"] = messages
+        final_params["system"] = base_params["system"]
 
         # Get final response
-        final_response = self.client.messages.create(**final_params)
+        final_response = self._create_message(final_params)
         return final_response.content[0].text
@@ -2,13 +2,16 @@ import warnings
 
 warnings.filterwarnings("ignore", message="resource_tracker: There appear to be.*")
 
+import json
 import os
 from typing import Any, Dict, List, Optional, Union
 
 from config import config
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from rag_system import RAGSystem
@@ -33,6 +36,11 @@ app.add_middleware(
 rag_system = RAGSystem(config)
 
 
+def get_rag_system() -> RAGSystem:
+    """Dependency returning the shared RAG system (overridable in tests)"""
+    return rag_system
+
+
 # Pydantic models for request/response
 class QueryRequest(BaseModel):
     """Request model for course queries"""
@@ -67,7 +75,9 @@ class CourseStats(BaseModel):
 
 
 @app.post("/api/query", response_model=QueryResponse)
-async def query_documents(request: QueryRequest):
+async def query_documents(
+    request: QueryRequest, rag_system: RAGSystem = Depends(get_rag_system)
+):
     """Process a query and return response with sources"""
     try:
         # Create session if not provided
@@ -75,16 +85,40 @@ async def query_documents(request: QueryRequest):
         if not session_id:
             session_id = rag_system.session_manager.create_session()
 
-        # Process query using RAG system
-        answer, sources = rag_system.query(request.query, session_id)
+        # Process query in a worker thread so blocking ChromaDB and Claude calls
+        # don't stall the event loop
+        answer, sources = await run_in_threadpool(
+            rag_system.query, request.query, session_id
+        )
 
         return QueryResponse(answer=answer, sources=sources, session_id=session_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/query/stream")
+async def query_documents_stream(
+    request: QueryRequest, rag_system: RAGSystem = Depends(get_rag_system)
+):
+    """Process a query and stream the response as server-sent events"""
+    # Create session if not provided
+    session_id = request.session_id
+    if not session_id:
+        session_id = rag_system.session_manager.create_session()
+
+    def event_stream():
+        yield f"data: {json.dumps({'type': 'session', 'session_id': session_id})}\n\n"
+        try:
+            for event in rag_system.query_stream(request.query, session_id):
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @app.get("/api/courses", response_model=CourseStats)
-async def get_course_stats():
+async def get_course_stats(rag_system: RAGSystem = Depends(get_rag_system)):
     """Get course analytics and statistics"""
     try:
         analytics = rag_system.get_course_analytics()
@@ -111,6 +145,12 @@ async def startup_event():
             print(f"Error loading documents: {e}")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the worker threads the RAG system started"""
+    rag_system.ai_generator.close()
+
+
 import os
 from pathlib import Path
 
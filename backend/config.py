@@ -24,6 +24,17 @@ class Config:
     MAX_RESULTS: int = 5  # Maximum search results to return
     MAX_HISTORY: int = 2  # Number of conversation messages to remember
 
+    # Response cache settings
+    RESPONSE_CACHE_SIZE: int = 512  # Maximum cached responses (0 disables)
+    RESPONSE_CACHE_TTL: int = 3600  # Seconds before a cached response expires
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95  # Min cosine similarity for a reuse
+
+    # Concurrency settings
+    TOOL_MAX_WORKERS: int = 8  # Threads for running tool calls in parallel
+    PARALLEL_PREFETCH: bool = False  # Prefetch outline+search for compare queries
+    RATE_LIMIT_RPM: int = 0  # Max Claude requests per minute (0 disables)
+    RATE_LIMIT_TPM: int = 0  # Max Claude tokens per minute (0 disables)
+
     # Database paths
     CHROMA_PATH: str = "./chroma_db"  # ChromaDB storage location
 
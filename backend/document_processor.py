@@ -4,6 +4,16 @@ from typing import List, Tuple
 
 from models import Course, CourseChunk, Lesson
 
+_WHITESPACE_RE = re.compile(r"\s+")
+# Sentence boundaries: whitespace after ./!/? and before a capital letter,
+# ignoring common abbreviations
+_SENTENCE_END_RE = re.compile(r"(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\!|\?)\s+(?=[A-Z])")
+_COURSE_TITLE_RE = re.compile(r"^Course Title:\s*(.+)$", re.IGNORECASE)
+_COURSE_LINK_RE = re.compile(r"^Course Link:\s*(.+)$", re.IGNORECASE)
+_INSTRUCTOR_RE = re.compile(r"^Course Instructor:\s*(.+)$", re.IGNORECASE)
+_LESSON_RE = re.compile(r"^Lesson\s+(\d+):\s*(.+)$", re.IGNORECASE)
+_LESSON_LINK_RE = re.compile(r"^Lesson Link:\s*(.+)$", re.IGNORECASE)
+
 
 class DocumentProcessor:
     """Processes course documents and extracts structured information"""
@@ -26,15 +36,10 @@ class DocumentProcessor:
         """Split text into sentence-based chunks with overlap using config settings"""
 
         # Clean up the text
-        text = re.sub(r"\s+", " ", text.strip())  # Normalize whitespace
+        text = _WHITESPACE_RE.sub(" ", text.strip())  # Normalize whitespace
 
         # Better sentence splitting that handles abbreviations
-        # This regex looks for periods followed by whitespace and capital letters
-        # but ignores common abbreviations
-        sentence_endings = re.compile(
-            r"(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\!|\?)\s+(?=[A-Z])"
-        )
-        sentences = sentence_endings.split(text)
+        sentences = _SENTENCE_END_RE.split(text)
 
         # Clean sentences
         sentences = [s.strip() for s in sentences if s.strip()]
@@ -116,9 +121,7 @@ class DocumentProcessor:
 
         # Parse course title from first line
         if len(lines) >= 1 and lines[0].strip():
-            title_match = re.match(
-                r"^Course Title:\s*(.+)$", lines[0].strip(), re.IGNORECASE
-            )
+            title_match = _COURSE_TITLE_RE.match(lines[0].strip())
             if title_match:
                 course_title = title_match.group(1).strip()
             else:
@@ -131,15 +134,13 @@ class DocumentProcessor:
                 continue
 
             # Try to match course link
-            link_match = re.match(r"^Course Link:\s*(.+)$", line, re.IGNORECASE)
+            link_match = _COURSE_LINK_RE.match(line)
             if link_match:
                 course_link = link_match.group(1).strip()
                 continue
 
             # Try to match instructor
-            instructor_match = re.match(
-                r"^Course Instructor:\s*(.+)$", line, re.IGNORECASE
-            )
+            instructor_match = _INSTRUCTOR_RE.match(line)
             if instructor_match:
                 instructor_name = instructor_match.group(1).strip()
                 continue
@@ -169,9 +170,7 @@ class DocumentProcessor:
             line = lines[i]
 
             # Check for lesson markers (e.g., "Lesson 0: Introduction")
-            lesson_match = re.match(
-                r"^Lesson\s+(\d+):\s*(.+)$", line.strip(), re.IGNORECASE
-            )
+            lesson_match = _LESSON_RE.match(line.strip())
 
             if lesson_match:
                 # Process previous lesson if it exists
@@ -214,9 +213,7 @@ class DocumentProcessor:
                 # Check if next line is a lesson link
                 if i + 1 < len(lines):
                     next_line = lines[i + 1].strip()
-                    link_match = re.match(
-                        r"^Lesson Link:\s*(.+)$", next_line, re.IGNORECASE
-                    )
+                    link_match = _LESSON_LINK_RE.match(next_line)
                     if link_match:
                         lesson_link = link_match.group(1).strip()
                         i += 1  # Skip the link line so it's not added to content
@@ -1,9 +1,11 @@
+import itertools
 import os
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from ai_generator import AIGenerator
 from document_processor import DocumentProcessor
 from models import Course, CourseChunk, Lesson
+from request_sources import collect_sources
 from search_tools import CourseOutlineTool, CourseSearchTool, ToolManager
 from session_manager import SessionManager
 from vector_store import VectorStore
@@ -23,7 +25,17 @@ class RAGSystem:
             config.CHROMA_PATH, config.EMBEDDING_MODEL, config.MAX_RESULTS
         )
         self.ai_generator = AIGenerator(
-            config.ANTHROPIC_API_KEY, config.ANTHROPIC_MODEL
+            config.ANTHROPIC_API_KEY,
+            config.ANTHROPIC_MODEL,
+            config.RESPONSE_CACHE_SIZE,
+            config.RESPONSE_CACHE_TTL,
+            embedding_function=self.vector_store.embedding_function,
+            semantic_cache_threshold=config.SEMANTIC_CACHE_THRESHOLD,
+            tool_max_workers=config.TOOL_MAX_WORKERS,
+            parallel_prefetch=config.PARALLEL_PREFETCH,
+            course_titles=self.vector_store.get_existing_course_titles,
+            max_rpm=config.RATE_LIMIT_RPM,
+            max_tpm=config.RATE_LIMIT_TPM,
         )
         self.session_manager = SessionManager(config.MAX_HISTORY)
 
@@ -140,26 +152,98 @@ class RAGSystem:
         if session_id:
             history = self.session_manager.get_conversation_history(session_id)
 
-        # Generate response using AI with tools
-        response = self.ai_generator.generate_response(
+        # Generate response using AI with tools, collecting the sources of this
+        # query's searches apart from those of concurrent queries
+        with collect_sources() as sources:
+            response = self.ai_generator.generate_response(
+                query=prompt,
+                conversation_history=history,
+                tools=self.tool_manager.get_tool_definitions(),
+                tool_manager=self.tool_manager,
+                user_query=query,
+            )
+
+        # Update conversation history
+        if session_id:
+            self.session_manager.add_exchange(session_id, query, response)
+
+        # Return response with sources from tool searches
+        return response, sources
+
+    def query_batch(self, queries: List[str]) -> List[str]:
+        """
+        Answer many independent queries in one Message Batches API request.
+
+        Meant for offline runs such as system validation, where throughput
+        matters more than latency. Queries carry no session history, and
+        sources are not tracked per query since tool-using answers are
+        finished one after another on the shared tool manager.
+
+        Args:
+            queries: User questions to answer
+
+        Returns:
+            Responses in the same order as queries
+        """
+        prompts = [
+            f"Answer this question about course materials: {query}" for query in queries
+        ]
+        responses = self.ai_generator.generate_response_batch(
+            prompts,
+            tools=self.tool_manager.get_tool_definitions(),
+            tool_manager=self.tool_manager,
+        )
+        self.tool_manager.reset_sources()
+        return responses
+
+    def query_stream(
+        self, query: str, session_id: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Process a user query like query, streaming the response as it is generated.
+
+        Args:
+            query: User's question
+            session_id: Optional session ID for conversation context
+
+        Yields:
+            {"type": "chunk", "text": ...} events with response text, followed by
+            a single {"type": "sources", "sources": [...]} event
+        """
+        # Create prompt for the AI with clear instructions
+        prompt = f"""Answer this question about course materials: {query}"""
+
+        # Get conversation history if session exists
+        history = None
+        if session_id:
+            history = self.session_manager.get_conversation_history(session_id)
+
+        stream = self.ai_generator.generate_response_stream(
             query=prompt,
             conversation_history=history,
             tools=self.tool_manager.get_tool_definitions(),
             tool_manager=self.tool_manager,
+            user_query=query,
         )
 
-        # Get sources from the search tool
-        sources = self.tool_manager.get_last_sources()
+        # The tool rounds all run before the first chunk arrives, so collect
+        # their sources around it. Starlette resumes this generator in a fresh
+        # context at each step, so the collection must not span a yield
+        with collect_sources() as sources:
+            first_chunk = next(stream, None)
 
-        # Reset sources after retrieving them
-        self.tool_manager.reset_sources()
+        # Stream response chunks while keeping the full text for the history
+        chunks = []
+        pending = [] if first_chunk is None else [first_chunk]
+        for chunk in itertools.chain(pending, stream):
+            chunks.append(chunk)
+            yield {"type": "chunk", "text": chunk}
 
         # Update conversation history
         if session_id:
-            self.session_manager.add_exchange(session_id, query, response)
+            self.session_manager.add_exchange(session_id, query, "".join(chunks))
 
-        # Return response with sources from tool searches
-        return response, sources
+        yield {"type": "sources", "sources": sources}
 
     def get_course_analytics(self) -> Dict:
         """Get analytics about the course catalog"""
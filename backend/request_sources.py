@@ -0,0 +1,36 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Optional
+
+# Sources of the request being answered in the current context, None outside one.
+# Tool threads run in a copy of the request's context and so share its list
+_current_sources: ContextVar[Optional[List[Any]]] = ContextVar(
+    "request_sources", default=None
+)
+
+
+@contextmanager
+def collect_sources() -> Iterator[List[Any]]:
+    """
+    Collect the sources recorded by searches run while the block is active.
+
+    Concurrent requests share one ToolManager, so its last_sources can belong
+    to another request by the time they are read; each block gets its own list.
+    Like ToolManager.get_last_sources, the list holds the latest search's sources.
+
+    Yields:
+        The list the sources are recorded into
+    """
+    sources: List[Any] = []
+    token = _current_sources.set(sources)
+    try:
+        yield sources
+    finally:
+        _current_sources.reset(token)
+
+
+def record_sources(sources: List[Any]) -> None:
+    """Replace the sources of the request being collected, if there is one"""
+    current = _current_sources.get()
+    if current is not None:
+        current[:] = sources
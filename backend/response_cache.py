@@ -0,0 +1,284 @@
+import bisect
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def tools_signature(tools: Optional[List[Dict[str, Any]]]) -> str:
+    """Hash tool schemas, so answers given with different tools are kept apart"""
+    return hashlib.blake2b(
+        json.dumps(tools or [], sort_keys=True).encode(), digest_size=16
+    ).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe in-process cache of generated responses with FIFO eviction"""
+
+    def __init__(self, max_size: int = 512, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_key(
+        query: str,
+        conversation_history: Optional[str] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+    ) -> str:
+        """
+        Build a cache key from the query, conversation history and tool schemas.
+
+        Args:
+            query: The user's question or request
+            conversation_history: Previous messages for context
+            tools: Available tool definitions
+
+        Returns:
+            Stable string key for the request
+        """
+        history_hash = hashlib.blake2b(
+            (conversation_history or "").encode(), digest_size=16
+        ).hexdigest()
+        return f"{query}\x00{history_hash}\x00{tools_signature(tools)}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            stored_at, response = entry
+            if self.ttl_seconds is not None and (
+                time.monotonic() - stored_at > self.ttl_seconds
+            ):
+                del self._entries[key]
+                return None
+            return response
+
+    def set(self, key: str, response: str):
+        """Store a response, evicting the oldest entries beyond max_size"""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic(), response)
+            while len(self._entries) > self.max_size:
+                del self._entries[next(iter(self._entries))]
+
+    def clear(self):
+        """Remove all cached responses"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SemanticResponseCache:
+    """
+    Cache that reuses a response for queries with near-identical embeddings.
+
+    Entries only match lookups in the same partition (e.g. the tools signature
+    the answer was generated with) and expire after ttl_seconds, like
+    ResponseCache entries.
+    """
+
+    def __init__(
+        self,
+        embedding_function: Callable[[List[str]], Any],
+        threshold: float = 0.95,
+        max_size: int = 512,
+        ttl_seconds: Optional[float] = None,
+    ):
+        self.embedding_function = embedding_function
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._vectors: Optional[np.ndarray] = None
+        self._responses: List[str] = []
+        self._partitions: List[str] = []
+        self._stored_at: List[float] = []  # time.monotonic() per entry, oldest first
+        self._lock = threading.RLock()
+
+    def encode(self, query: str) -> np.ndarray:
+        """Embed a query as an L2-normalized vector"""
+        vector = np.asarray(self.embedding_function([query])[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, query_vector: np.ndarray, partition: str = "") -> Optional[str]:
+        """
+        Find the cached response whose query is most similar to query_vector.
+
+        Args:
+            query_vector: Normalized embedding of the incoming query
+            partition: Only entries added with the same partition can match
+
+        Returns:
+            The cached response if its cosine similarity meets the threshold,
+            otherwise None
+        """
+        with self._lock:
+            self._drop_expired(time.monotonic())
+            if self._vectors is None:
+                return None
+
+            similarities = self._vectors @ query_vector
+            in_partition = np.array([p == partition for p in self._partitions])
+            similarities = np.where(in_partition, similarities, -np.inf)
+            best = int(similarities.argmax())
+            if similarities[best] >= self.threshold:
+                return self._responses[best]
+            return None
+
+    def add(
+        self,
+        query_vector: np.ndarray,
+        response: str,
+        partition: str = "",
+        stored_at: Optional[float] = None,
+    ):
+        """Store a response, evicting the oldest entries beyond max_size"""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = query_vector.reshape(1, -1)
+            else:
+                self._vectors = np.vstack([self._vectors, query_vector])
+            self._responses.append(response)
+            self._partitions.append(partition)
+            self._stored_at.append(time.monotonic() if stored_at is None else stored_at)
+
+            if len(self._responses) > self.max_size:
+                self._keep_from(len(self._responses) - self.max_size)
+
+    def clear(self):
+        """Remove all cached responses"""
+        with self._lock:
+            self._vectors = None
+            self._responses = []
+            self._partitions = []
+            self._stored_at = []
+
+    def save(self, path: str):
+        """Write the cached entries, with their partitions and ages, to a JSON file"""
+        with self._lock:
+            now = time.monotonic()
+            data = {
+                "saved_at": time.time(),
+                "vectors": [] if self._vectors is None else self._vectors.tolist(),
+                "responses": list(self._responses),
+                "partitions": list(self._partitions),
+                "ages": [now - stored_at for stored_at in self._stored_at],
+            }
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+
+    def load(self, path: str):
+        """Replace the cache contents with a file written by save, if it exists"""
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+
+        # Entries keep aging while the file sits on disk
+        count = len(data["responses"])
+        partitions = data.get("partitions", [""] * count)
+        ages = data.get("ages", [0.0] * count)
+        offline = max(time.time() - data.get("saved_at", time.time()), 0.0)
+        now = time.monotonic()
+
+        with self._lock:
+            self.clear()
+            for vector, response, partition, age in zip(
+                data["vectors"], data["responses"], partitions, ages
+            ):
+                self.add(
+                    np.asarray(vector, dtype=np.float32),
+                    response,
+                    partition,
+                    stored_at=now - age - offline,
+                )
+            self._drop_expired(now)
+
+    def _drop_expired(self, now: float):
+        """Drop entries older than the TTL; the caller must hold the lock"""
+        if self.ttl_seconds is None:
+            return
+        self._keep_from(bisect.bisect_left(self._stored_at, now - self.ttl_seconds))
+
+    def _keep_from(self, start: int):
+        """Drop the entries before index start; the caller must hold the lock"""
+        if start <= 0:
+            return
+        if start >= len(self._responses):
+            self.clear()
+            return
+        assert self._vectors is not None
+        self._vectors = self._vectors[start:]
+        self._responses = self._responses[start:]
+        self._partitions = self._partitions[start:]
+        self._stored_at = self._stored_at[start:]
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+
+class _Call:
+    """An in-flight computation that duplicate callers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into a single execution"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn for key, or wait for and share the result of an identical call.
+
+        Args:
+            key: Identifies equivalent calls
+            fn: Computation to run if no call for key is in flight
+
+        Returns:
+            The result of fn (re-raising its exception for every waiter)
+        """
+        with self._lock:
+            existing = self._calls.get(key)
+            if existing is None:
+                call = self._calls[key] = _Call()
+
+        if existing is not None:
+            existing.done.wait()
+            if existing.error is not None:
+                raise existing.error
+            return existing.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import Any, Dict, Optional, Protocol
 
+from request_sources import record_sources
 from vector_store import SearchResults, VectorStore
 
 
@@ -120,8 +121,9 @@ class CourseSearchTool(Tool):
 
             formatted.append(f"{header}\n{doc}")
 
-        # Store sources for retrieval
+        # Store sources for retrieval, and for the request that ran this search
         self.last_sources = sources
+        record_sources(sources)
 
         return "\n\n".join(formatted)
 
@@ -1,5 +1,11 @@
 """
 Test configuration and fixtures for the RAG system tests.
+
+The API test classes and the pure-mock ``unit`` modules (test_rag_system,
+test_search_tools) share no state, so they can run in parallel with
+pytest-xdist: ``pytest -n auto --dist=loadscope``. Session- and module-scoped
+fixtures (the test app, its client and RAG mock, the shared mocked RAGSystem
+and store) are then built once per worker.
 """
 
 import pytest
@@ -8,14 +14,15 @@ import shutil
 import os
 from unittest.mock import Mock, MagicMock, patch
 from fastapi.testclient import TestClient
+from types import MappingProxyType
 from typing import Generator
 
-# Add backend directory to path
-import sys
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
+# backend/ is on sys.path via the pytest "pythonpath" setting in pyproject.toml
 from config import Config
-from rag_system import RAGSystem
+
+# The test app skips response-model revalidation on /api/query; set TESTING=0
+# to exercise the validated route exactly as production declares it
+TESTING = os.environ.get("TESTING", "1") != "0"
 
 
 @pytest.fixture
@@ -81,6 +88,9 @@ def mock_vector_store():
 @pytest.fixture
 def mock_rag_system(test_config, mock_anthropic_client, mock_vector_store):
     """Create a mocked RAG system for testing."""
+    # Imported here so collection does not pull in the anthropic/chromadb stack
+    from rag_system import RAGSystem
+    
     with patch.multiple(
         'rag_system',
         VectorStore=lambda config: mock_vector_store,
@@ -96,16 +106,52 @@ def mock_rag_system(test_config, mock_anthropic_client, mock_vector_store):
         yield rag_system
 
 
-@pytest.fixture
-def test_app():
+def _configure_app_rag_mock(mock_rag: MagicMock) -> MagicMock:
+    """Reset the test app's RAG mock and apply its default return values."""
+    mock_rag.reset_mock(return_value=True, side_effect=True)
+    mock_rag.query.return_value = ("Test response", ["Test source"])
+    mock_rag.query_stream.return_value = [
+        {"type": "chunk", "text": "Test "},
+        {"type": "chunk", "text": "response"},
+        {"type": "sources", "sources": ["Test source"]},
+    ]
+    mock_rag.session_manager.create_session.return_value = "test_session_123"
+    mock_rag.get_course_analytics.return_value = {
+        "total_courses": 2,
+        "course_titles": ["Test Course 1", "Test Course 2"]
+    }
+    return mock_rag
+
+
+@pytest.fixture(scope="session")
+def app_rag_mock() -> MagicMock:
+    """RAG system mock shared by the session-scoped test app."""
+    return _configure_app_rag_mock(MagicMock())
+
+
+@pytest.fixture(scope="session")
+def test_app(app_rag_mock):
     """Create a test FastAPI application without static file mounting."""
-    from fastapi import FastAPI, HTTPException
+    from fastapi import Depends, FastAPI, HTTPException
     from fastapi.middleware.cors import CORSMiddleware
     from pydantic import BaseModel
     from typing import List, Optional, Union
     
+    import json
+    from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+    
+    # Serialize responses with orjson; fall back to stdlib json without it
+    response_class: type[JSONResponse] = ORJSONResponse
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        response_class = JSONResponse
+    
     # Create a minimal test app that mirrors the main app structure
-    app = FastAPI(title="Test Course Materials RAG System")
+    app = FastAPI(
+        title="Test Course Materials RAG System",
+        default_response_class=response_class,
+    )
     
     app.add_middleware(
         CORSMiddleware,
@@ -133,27 +179,42 @@ def test_app():
         total_courses: int
         course_titles: List[str]
     
-    # Mock RAG system for the app
-    mock_rag = MagicMock()
-    mock_rag.query.return_value = ("Test response", ["Test source"])
-    mock_rag.session_manager.create_session.return_value = "test_session_123"
-    mock_rag.get_course_analytics.return_value = {
-        "total_courses": 2,
-        "course_titles": ["Test Course 1", "Test Course 2"]
-    }
+    # Mock RAG system for the app, injected so tests can override it
+    def get_rag_system():
+        return app_rag_mock
+
+    app.state.get_rag_system = get_rag_system
     
-    # API endpoints
-    @app.post("/api/query", response_model=QueryResponse)
-    async def query_documents(request: QueryRequest):
+    # API endpoints; under TESTING the body is built without validation
+    @app.post("/api/query", response_model=None if TESTING else QueryResponse)
+    async def query_documents(request: QueryRequest, mock_rag=Depends(get_rag_system)):
         try:
             session_id = request.session_id or mock_rag.session_manager.create_session()
             answer, sources = mock_rag.query(request.query, session_id)
+            if TESTING:
+                return QueryResponse.model_construct(
+                    answer=answer, sources=sources, session_id=session_id
+                ).model_dump()
             return QueryResponse(answer=answer, sources=sources, session_id=session_id)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
     
+    @app.post("/api/query/stream")
+    async def query_documents_stream(request: QueryRequest, mock_rag=Depends(get_rag_system)):
+        session_id = request.session_id or mock_rag.session_manager.create_session()
+        
+        def event_stream():
+            yield f"data: {json.dumps({'type': 'session', 'session_id': session_id})}\n\n"
+            try:
+                for event in mock_rag.query_stream(request.query, session_id):
+                    yield f"data: {json.dumps(event)}\n\n"
+            except Exception as e:
+                yield f"data: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+        
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+    
     @app.get("/api/courses", response_model=CourseStats)
-    async def get_course_stats():
+    async def get_course_stats(mock_rag=Depends(get_rag_system)):
         try:
             analytics = mock_rag.get_course_analytics()
             return CourseStats(
@@ -170,17 +231,48 @@ def test_app():
     return app
 
 
-@pytest.fixture
-def test_client(test_app) -> Generator[TestClient, None, None]:
-    """Create a test client for the FastAPI app."""
+@pytest.fixture(scope="session")
+def session_test_client(test_app) -> Generator[TestClient, None, None]:
+    """Create one test client for the FastAPI app per session."""
     with TestClient(test_app) as client:
         yield client
 
 
 @pytest.fixture
+def test_client(session_test_client, app_rag_mock) -> TestClient:
+    """Shared test client, with the app's RAG mock reset for each test."""
+    _configure_app_rag_mock(app_rag_mock)
+    return session_test_client
+
+
+@pytest.fixture
+def override_rag_system(test_app):
+    """Swap the RAG system the test app injects; overrides are cleared after."""
+    def override(rag_system):
+        test_app.dependency_overrides[test_app.state.get_rag_system] = lambda: rag_system
+    yield override
+    test_app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def failing_rag(override_rag_system):
+    """Inject a RAG system whose query, streaming and analytics calls raise."""
+    rag = MagicMock()
+    rag.query.side_effect = Exception("Database connection failed")
+    rag.query_stream.side_effect = Exception("Database connection failed")
+    rag.get_course_analytics.side_effect = Exception("Analytics unavailable")
+    override_rag_system(rag)
+    return rag
+
+
+@pytest.fixture(scope="session")
 def sample_query_data():
-    """Sample data for testing query endpoints."""
-    return {
+    """Sample data for testing query endpoints, built once and read-only.
+
+    Request bodies stay plain dicts so ``json=`` can serialize them; tests
+    must not mutate them.
+    """
+    return MappingProxyType({
         "valid_query": {
             "query": "What is machine learning?",
             "session_id": "test_session_123"
@@ -196,7 +288,7 @@ def sample_query_data():
             "sources": ["Test source"],
             "session_id": "test_session_123"
         }
-    }
+    })
 
 
 @pytest.fixture
@@ -1,579 +1,1226 @@
-import os
-import sys
-import unittest
-from unittest.mock import MagicMock, Mock, patch
+"""
+Tests for AIGenerator.
 
-# Add parent directory to path to import modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+Set FAST_TESTS=1 to skip the private _handle_tool_execution tests, whose
+paths are also covered through generate_response.
+"""
 
+import os
+import re
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType, SimpleNamespace
+from typing import Any, Dict
+from unittest.mock import MagicMock, Mock, call, create_autospec, patch
+
+import pytest
 from ai_generator import AIGenerator
-
-
+from request_sources import collect_sources, record_sources
+from response_cache import ResponseCache
+from search_tools import ToolManager
+from usage_tracker import UsageTracker
+
+# Reduced run that skips tests duplicated by public-API coverage
+FAST = os.environ.get("FAST_TESTS") == "1"
+
+API_KEY = "test_api_key"
+MODEL = "claude-sonnet-4-20250514"
+
+# Read-only request parameters shared by the _handle_tool_execution tests
+BASE_PARAMS = MappingProxyType(
+    {
+        # A tuple, so in-place mutation by the code under test fails fast
+        "messages": ({"role": "user", "content": "Test query"},),
+        "system": "Test system prompt",
+        "model": MODEL,
+        "temperature": 0,
+        "max_tokens": 800,
+    }
+)
+
+BATCH_USAGE = SimpleNamespace(input_tokens=100, output_tokens=20)
+HISTORY = "User: Previous question\nAssistant: Previous answer"
+SEARCH_TOOLS = [{"name": "search_course_content", "description": "Search content"}]
+_CACHED_TOOLS = [{**SEARCH_TOOLS[0], "cache_control": {"type": "ephemeral"}}]
+
+OUTLINE_SEARCH_TOOLS = [
+    {"name": "get_course_outline", "description": "Get course outline"},
+    {"name": "search_course_content", "description": "Search course content"},
+]
+
+# Course titles from docs/, several containing "with", "and" or "to"
+COURSE_TITLES = [
+    "Building Towards Computer Use with Anthropic",
+    "MCP: Build Rich-Context AI Apps with Anthropic",
+    "Advanced Retrieval for AI with Chroma",
+    "Prompt Compression and Query Optimization",
+]
+
+# (case name, generate_response kwargs, tools expected in the request,
+#  whether a tool manager is passed)
+DIRECT_ANSWER_CASES = [
+    ("no_tools", {}, None, False),
+    ("with_tools", {"tools": SEARCH_TOOLS}, _CACHED_TOOLS, False),
+    ("with_history", {"conversation_history": HISTORY}, None, False),
+    ("with_tool_manager", {"tools": SEARCH_TOOLS}, _CACHED_TOOLS, True),
+]
+
+# Key phrases the system prompt must contain
+_SYSTEM_PROMPT_TERMS = (
+    "search_course_content",
+    "get_course_outline",
+    "Tool Usage Guidelines",
+    "Response Protocol",
+    "Brief, Concise and focused",
+)
+_SYSTEM_PROMPT_RE = re.compile("|".join(map(re.escape, _SYSTEM_PROMPT_TERMS)))
+
+
+@dataclass(frozen=True, slots=True)
+class TextBlock:
+    """Text content block in a mock Anthropic response"""
+
+    text: str
+    type: str = "text"
+
+
+@dataclass(slots=True)
 class MockAnthropicResponse:
     """Mock response from Anthropic API"""
 
-    def __init__(self, content, stop_reason="end_turn"):
-        self.content = content if isinstance(content, list) else [Mock(text=content)]
-        self.stop_reason = stop_reason
+    content: Any
+    stop_reason: str = "end_turn"
+    usage: Any = None
+
+    def __post_init__(self):
+        if not isinstance(self.content, list):
+            self.content = [TextBlock(self.content)]
 
 
+@dataclass(frozen=True, slots=True)
 class MockToolUseContent:
     """Mock tool use content block"""
 
-    def __init__(self, name, input_params, tool_id="test_id"):
-        self.type = "tool_use"
-        self.name = name
-        self.input = input_params
-        self.id = tool_id
-
-
-class TestAIGenerator(unittest.TestCase):
-    """Test cases for AIGenerator"""
-
-    def setUp(self):
-        """Set up test fixtures"""
-        self.api_key = "test_api_key"
-        self.model = "claude-sonnet-4-20250514"
-
-        # Mock the anthropic client - reset for each test
-        self.mock_client = Mock()
-        self.mock_client.reset_mock()  # Ensure clean state
-
-        # Create AIGenerator with mocked client
-        with patch("ai_generator.anthropic.Anthropic") as mock_anthropic:
-            mock_anthropic.return_value = self.mock_client
-            self.ai_generator = AIGenerator(self.api_key, self.model)
-
-    def test_initialization(self):
-        """Test AIGenerator initialization"""
-        self.assertEqual(self.ai_generator.model, self.model)
-        self.assertIn("model", self.ai_generator.base_params)
-        self.assertEqual(self.ai_generator.base_params["model"], self.model)
-        self.assertEqual(self.ai_generator.base_params["temperature"], 0)
-        self.assertEqual(self.ai_generator.base_params["max_tokens"], 800)
-
-    def test_generate_response_without_tools(self):
-        """Test generate_response without tools (direct text response)"""
-        mock_response = MockAnthropicResponse("This is a direct response.")
-        self.mock_client.messages.create.return_value = mock_response
-
-        result = self.ai_generator.generate_response("What is AI?")
-
-        self.assertEqual(result, "This is a direct response.")
-
-        # Verify API call
-        self.mock_client.messages.create.assert_called_once()
-        call_args = self.mock_client.messages.create.call_args[1]
-        self.assertEqual(call_args["model"], self.model)
-        self.assertEqual(
-            call_args["messages"], [{"role": "user", "content": "What is AI?"}]
-        )
-        self.assertNotIn("tools", call_args)
-
-    def test_generate_response_with_tools_no_tool_use(self):
-        """Test generate_response with tools available but not used"""
-        mock_response = MockAnthropicResponse(
-            "This is a direct response without tool use."
-        )
-        self.mock_client.messages.create.return_value = mock_response
-
-        tools = [{"name": "test_tool", "description": "A test tool"}]
-
-        result = self.ai_generator.generate_response("What is AI?", tools=tools)
-
-        self.assertEqual(result, "This is a direct response without tool use.")
-
-        # Verify API call includes tools
-        call_args = self.mock_client.messages.create.call_args[1]
-        self.assertEqual(call_args["tools"], tools)
-        self.assertEqual(call_args["tool_choice"], {"type": "auto"})
-
-    def test_generate_response_with_conversation_history(self):
-        """Test generate_response with conversation history"""
-        mock_response = MockAnthropicResponse("Response with context.")
-        self.mock_client.messages.create.return_value = mock_response
-
-        history = "User: Previous question\nAssistant: Previous answer"
-
-        result = self.ai_generator.generate_response(
-            "Follow-up question", conversation_history=history
-        )
-
-        self.assertEqual(result, "Response with context.")
-
-        # Verify system prompt includes history
-        call_args = self.mock_client.messages.create.call_args[1]
-        self.assertIn("Previous conversation:", call_args["system"])
-        self.assertIn(history, call_args["system"])
-
-    def test_generate_response_with_tool_use(self):
-        """Test generate_response when AI decides to use a tool"""
-        # Mock tool use response
-        tool_use_content = MockToolUseContent(
-            "search_course_content", {"query": "machine learning"}
-        )
-        mock_initial_response = MockAnthropicResponse(
-            [tool_use_content], stop_reason="tool_use"
-        )
-
-        # Mock final response after tool execution
-        mock_final_response = MockAnthropicResponse(
-            "Based on the search results, machine learning is..."
-        )
-
-        self.mock_client.messages.create.side_effect = [
-            mock_initial_response,
-            mock_final_response,
-        ]
-
-        # Mock tool manager
-        mock_tool_manager = Mock()
-        mock_tool_manager.execute_tool.return_value = (
-            "Machine learning course content found."
-        )
-
-        tools = [
-            {"name": "search_course_content", "description": "Search course content"}
-        ]
-
-        result = self.ai_generator.generate_response(
-            "What is machine learning?", tools=tools, tool_manager=mock_tool_manager
-        )
-
-        self.assertEqual(result, "Based on the search results, machine learning is...")
-
-        # Verify tool was executed
-        mock_tool_manager.execute_tool.assert_called_once_with(
-            "search_course_content", query="machine learning"
-        )
-
-        # Verify two API calls were made
-        self.assertEqual(self.mock_client.messages.create.call_count, 2)
-
-    def test_handle_tool_execution_single_tool(self):
-        """Test _handle_tool_execution with single tool call"""
-        # Setup initial response with tool use
-        tool_use_content = MockToolUseContent(
-            "test_tool", {"param": "value"}, "tool_123"
-        )
-        mock_initial_response = MockAnthropicResponse(
-            [tool_use_content], stop_reason="tool_use"
-        )
-
-        # Setup base params
-        base_params = {
-            "messages": [{"role": "user", "content": "Test query"}],
-            "system": "Test system prompt",
-            "model": self.model,
-            "temperature": 0,
-            "max_tokens": 800,
+    name: str
+    input: Dict[str, Any]
+    id: str = "test_id"
+    type: str = "tool_use"
+
+    def model_dump(self, **kwargs):
+        return {
+            "type": self.type,
+            "id": self.id,
+            "name": self.name,
+            "input": self.input,
         }
 
-        # Mock tool manager
-        mock_tool_manager = Mock()
-        mock_tool_manager.execute_tool.return_value = "Tool execution result"
 
-        # Mock final response
-        mock_final_response = MockAnthropicResponse("Final response with tool results")
-        self.mock_client.messages.create.return_value = mock_final_response
+@pytest.fixture(scope="module")
+def shared_client():
+    """One mocked Anthropic client for every test in the module"""
+    return Mock()
 
-        # Execute
-        result = self.ai_generator._handle_tool_execution(
-            mock_initial_response, base_params, mock_tool_manager
-        )
 
-        self.assertEqual(result, "Final response with tool results")
+@pytest.fixture(scope="module")
+def shared_generator(shared_client):
+    """One AIGenerator for the module, built against the mocked client"""
+    # Patching the shared client cache keeps other modules' clients out
+    with (
+        patch("ai_generator.anthropic.Anthropic") as mock_anthropic,
+        patch.dict("ai_generator._CLIENTS", clear=True),
+    ):
+        mock_anthropic.return_value = shared_client
+        generator = AIGenerator(API_KEY, MODEL)
+        yield generator
+    generator.close()
 
-        # Verify tool execution
-        mock_tool_manager.execute_tool.assert_called_once_with(
-            "test_tool", param="value"
-        )
 
-        # Verify final API call
-        final_call_args = self.mock_client.messages.create.call_args[1]
-        self.assertEqual(
-            len(final_call_args["messages"]), 3
-        )  # original + assistant + tool_result
-
-        # Check tool result message format
-        tool_result_msg = final_call_args["messages"][2]
-        self.assertEqual(tool_result_msg["role"], "user")
-        self.assertEqual(len(tool_result_msg["content"]), 1)
-        self.assertEqual(tool_result_msg["content"][0]["type"], "tool_result")
-        self.assertEqual(tool_result_msg["content"][0]["tool_use_id"], "tool_123")
-        self.assertEqual(
-            tool_result_msg["content"][0]["content"], "Tool execution result"
-        )
+@pytest.fixture
+def mock_client(shared_client):
+    """The shared client mock with return values and side effects reset"""
+    shared_client.reset_mock(return_value=True, side_effect=True)
+    return shared_client
 
-    def test_handle_tool_execution_multiple_tools(self):
-        """Test _handle_tool_execution with multiple tool calls"""
-        # Setup initial response with multiple tool uses
-        tool_use_1 = MockToolUseContent("tool_1", {"param1": "value1"}, "tool_123")
-        tool_use_2 = MockToolUseContent("tool_2", {"param2": "value2"}, "tool_456")
-        mock_initial_response = MockAnthropicResponse(
-            [tool_use_1, tool_use_2], stop_reason="tool_use"
-        )
 
-        base_params = {
-            "messages": [{"role": "user", "content": "Test query"}],
-            "system": "Test system prompt",
-            "model": self.model,
-            "temperature": 0,
-            "max_tokens": 800,
+@pytest.fixture
+def ai_generator(shared_generator, mock_client):
+    """The shared generator with the state tests mutate reset"""
+    shared_generator.response_cache.clear()
+    shared_generator.response_cache.max_size = 512
+    shared_generator.parallel_prefetch = False
+    shared_generator.course_titles = None
+    shared_generator.usage_tracker = UsageTracker()
+    return shared_generator
+
+
+def tool_use_response(name, input_params, tool_id="test_id"):
+    """Return a mock response in which Claude calls a single tool"""
+    return MockAnthropicResponse(
+        [MockToolUseContent(name, input_params, tool_id)], stop_reason="tool_use"
+    )
+
+
+def make_tool_manager():
+    """Return a ToolManager mock whose methods enforce the real signatures"""
+    return create_autospec(ToolManager, instance=True)
+
+
+def calls_as_set(mock):
+    """Return a mock's calls as a set of (args, sorted kwargs items) tuples"""
+    return {
+        (recorded.args, tuple(sorted(recorded.kwargs.items())))
+        for recorded in mock.call_args_list
+    }
+
+
+class FakeToolManager:
+    """Tool manager stub returning (or raising) canned results in call order"""
+
+    __slots__ = ("_results", "calls")
+
+    def __init__(self, results):
+        self._results = iter(results)
+        self.calls = []
+
+    def execute_tool(self, name, **kwargs):
+        self.calls.append((name, kwargs))
+        result = next(self._results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_initialization(ai_generator):
+    """Test AIGenerator initialization"""
+    assert ai_generator.model == MODEL
+    assert "model" in ai_generator.base_params
+    assert ai_generator.base_params["model"] == MODEL
+    assert ai_generator.base_params["temperature"] == 0
+    assert ai_generator.base_params["max_tokens"] == 800
+
+
+def test_client_shared_across_instances():
+    """Test that instances with the same API key reuse one client"""
+    with (
+        patch("ai_generator.anthropic.Anthropic") as mock_anthropic,
+        patch.dict("ai_generator._CLIENTS", clear=True),
+    ):
+        first = AIGenerator(API_KEY, MODEL)
+        second = AIGenerator(API_KEY, MODEL)
+
+    assert first.client is second.client
+    mock_anthropic.assert_called_once()
+    first.close()
+    second.close()
+
+
+def test_close_stops_tool_executor():
+    """Test close shuts down the tool thread pool"""
+    with patch("ai_generator.anthropic.Anthropic"), patch.dict("ai_generator._CLIENTS"):
+        generator = AIGenerator(API_KEY, MODEL)
+
+    generator.close()
+
+    with pytest.raises(RuntimeError):
+        generator._tool_executor.submit(print)
+
+
+@pytest.mark.parametrize(
+    "name, kwargs, expected_tools, with_manager",
+    DIRECT_ANSWER_CASES,
+    ids=[case[0] for case in DIRECT_ANSWER_CASES],
+)
+def test_generate_response_direct_answer_variants(
+    ai_generator, mock_client, name, kwargs, expected_tools, with_manager
+):
+    """Test generate_response request shape when Claude answers directly"""
+    tool_manager = FakeToolManager([]) if with_manager else None
+    answer = f"Direct answer ({name})."
+    mock_client.messages.create.return_value = MockAnthropicResponse(answer)
+    query = f"What is {name}?"
+
+    result = ai_generator.generate_response(query, tool_manager=tool_manager, **kwargs)
+
+    assert result == answer
+    mock_client.messages.create.assert_called_once()
+    call_args = mock_client.messages.create.call_args[1]
+    assert call_args["model"] == MODEL
+    assert call_args["messages"] == [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": query,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ],
         }
-
-        # Mock tool manager
-        mock_tool_manager = Mock()
-        mock_tool_manager.execute_tool.side_effect = ["Result 1", "Result 2"]
-
-        # Mock final response
-        mock_final_response = MockAnthropicResponse(
-            "Final response with multiple tool results"
+    ]
+
+    # Tools are sent with the last one marked for caching
+    if expected_tools is None:
+        assert "tools" not in call_args
+    else:
+        assert call_args["tools"] == expected_tools
+        assert call_args["tool_choice"] == {"type": "auto"}
+        assert "cache_control" not in kwargs["tools"][0]
+
+    # System prompt is cached and history is a separate block
+    static_block, *history_blocks = call_args["system"]
+    assert static_block["text"] == AIGenerator.SYSTEM_PROMPT
+    assert static_block["cache_control"] == {"type": "ephemeral"}
+    history = kwargs.get("conversation_history")
+    if history:
+        (history_block,) = history_blocks
+        assert "Previous conversation:" in history_block["text"]
+        assert history in history_block["text"]
+        assert "cache_control" not in history_block
+    else:
+        assert history_blocks == []
+
+    # No tools are executed for a direct answer
+    if tool_manager is not None:
+        assert tool_manager.calls == []
+
+
+def test_generate_response_with_tool_use(ai_generator, mock_client):
+    """Test generate_response when AI decides to use a tool"""
+    # Mock tool use response
+    mock_initial_response = tool_use_response(
+        "search_course_content", {"query": "machine learning"}
+    )
+
+    # Mock final response after tool execution
+    mock_final_response = MockAnthropicResponse(
+        "Based on the search results, machine learning is..."
+    )
+
+    mock_client.messages.create.side_effect = [
+        mock_initial_response,
+        mock_final_response,
+    ]
+
+    # Mock tool manager
+    mock_tool_manager = make_tool_manager()
+    mock_tool_manager.execute_tool.return_value = (
+        "Machine learning course content found."
+    )
+
+    result = ai_generator.generate_response(
+        "What is machine learning?", tools=SEARCH_TOOLS, tool_manager=mock_tool_manager
+    )
+
+    assert result == "Based on the search results, machine learning is..."
+
+    # Verify tool was executed
+    assert mock_tool_manager.execute_tool.call_args_list == [
+        call("search_course_content", query="machine learning")
+    ]
+
+    # Verify two API calls were made
+    assert mock_client.messages.create.call_count == 2
+
+
+def test_generate_response_cache_hit(ai_generator, mock_client):
+    """Test repeated identical requests are served from the response cache"""
+    mock_response = MockAnthropicResponse("Cached answer.")
+    mock_client.messages.create.return_value = mock_response
+
+    first = ai_generator.generate_response("What is AI?")
+    second = ai_generator.generate_response("What is AI?")
+
+    assert first == "Cached answer."
+    assert second == "Cached answer."
+    mock_client.messages.create.assert_called_once()
+
+    # Different conversation history must miss the cache
+    ai_generator.generate_response("What is AI?", conversation_history=HISTORY)
+    assert mock_client.messages.create.call_count == 2
+
+
+def test_generate_response_semantic_cache_hit(ai_generator, mock_client):
+    """Test paraphrased queries reuse a cached response via embeddings"""
+    vectors = {
+        "What is ML?": [1.0, 0.0],
+        "Explain machine learning": [0.99, 0.05],
+        "What is Python?": [0.0, 1.0],
+    }
+    with (
+        patch("ai_generator.anthropic.Anthropic") as mock_anthropic,
+        patch.dict("ai_generator._CLIENTS", clear=True),
+    ):
+        mock_anthropic.return_value = mock_client
+        ai_generator = AIGenerator(
+            API_KEY,
+            MODEL,
+            embedding_function=lambda texts: [vectors[t] for t in texts],
         )
-        self.mock_client.messages.create.return_value = mock_final_response
-
-        # Execute
-        result = self.ai_generator._handle_tool_execution(
-            mock_initial_response, base_params, mock_tool_manager
+    mock_client.messages.create.return_value = MockAnthropicResponse("ML answer.")
+
+    ai_generator.generate_response("What is ML?")
+    result = ai_generator.generate_response("Explain machine learning")
+
+    assert result == "ML answer."
+    mock_client.messages.create.assert_called_once()
+
+    # Dissimilar queries still reach the API
+    ai_generator.generate_response("What is Python?")
+    assert mock_client.messages.create.call_count == 2
+
+
+def test_semantic_cache_honours_tools_and_ttl(ai_generator, mock_client):
+    """Test semantic matches need the same tools and use the response cache TTL"""
+    with (
+        patch("ai_generator.anthropic.Anthropic") as mock_anthropic,
+        patch.dict("ai_generator._CLIENTS", clear=True),
+    ):
+        mock_anthropic.return_value = mock_client
+        ai_generator = AIGenerator(
+            API_KEY,
+            MODEL,
+            cache_ttl_seconds=30,
+            embedding_function=lambda texts: [[1.0, 0.0] for _ in texts],
         )
-
-        self.assertEqual(result, "Final response with multiple tool results")
-
-        # Verify both tools were executed
-        self.assertEqual(mock_tool_manager.execute_tool.call_count, 2)
-        mock_tool_manager.execute_tool.assert_any_call("tool_1", param1="value1")
-        mock_tool_manager.execute_tool.assert_any_call("tool_2", param2="value2")
-
-        # Verify final API call has multiple tool results
-        final_call_args = self.mock_client.messages.create.call_args[1]
-        tool_result_msg = final_call_args["messages"][2]
-        self.assertEqual(len(tool_result_msg["content"]), 2)  # Two tool results
-
-    def test_system_prompt_content(self):
-        """Test that system prompt contains expected content"""
-        system_prompt = AIGenerator.SYSTEM_PROMPT
-
-        # Check for key elements
-        self.assertIn("search_course_content", system_prompt)
-        self.assertIn("get_course_outline", system_prompt)
-        self.assertIn("Tool Usage Guidelines", system_prompt)
-        self.assertIn("Response Protocol", system_prompt)
-        self.assertIn("Brief, Concise and focused", system_prompt)
-
-    def test_api_error_handling(self):
-        """Test handling of API errors"""
-        self.mock_client.messages.create.side_effect = Exception("API Error")
-
-        with self.assertRaises(Exception) as context:
-            self.ai_generator.generate_response("Test query")
-
-        self.assertEqual(str(context.exception), "API Error")
-
-    def test_empty_tool_results_handling(self):
-        """Test handling when no tool results are generated"""
-        # Mock response with tool use but no actual tool use content
-        mock_response = MockAnthropicResponse([], stop_reason="tool_use")
-
-        base_params = {
-            "messages": [{"role": "user", "content": "Test"}],
-            "system": "Test system",
-            "model": self.model,
-            "temperature": 0,
-            "max_tokens": 800,
-        }
-
-        mock_tool_manager = Mock()
-
-        # Mock final response
-        mock_final_response = MockAnthropicResponse("Response with no tools")
-        self.mock_client.messages.create.return_value = mock_final_response
-
-        result = self.ai_generator._handle_tool_execution(
-            mock_response, base_params, mock_tool_manager
-        )
-
-        self.assertEqual(result, "Response with no tools")
-
-        # Verify no tools were executed
-        mock_tool_manager.execute_tool.assert_not_called()
-
-    def test_sequential_tool_calling_two_rounds(self):
-        """Test sequential tool calling over two rounds"""
-        # Mock first round - tool use response
-        tool_use_1 = MockToolUseContent(
-            "get_course_outline", {"course_name": "course_x"}, "tool_1"
-        )
-        mock_response_1 = MockAnthropicResponse([tool_use_1], stop_reason="tool_use")
-
-        # Mock second round - tool use response
-        tool_use_2 = MockToolUseContent(
-            "search_course_content", {"query": "machine learning"}, "tool_2"
-        )
-        mock_response_2 = MockAnthropicResponse([tool_use_2], stop_reason="tool_use")
-
-        # Mock final response after max rounds
-        mock_final_response = MockAnthropicResponse(
-            "Based on both searches, here is the comprehensive answer."
-        )
-
-        self.mock_client.messages.create.side_effect = [
-            mock_response_1,
-            mock_response_2,
-            mock_final_response,
+    mock_client.messages.create.side_effect = [
+        MockAnthropicResponse("Answer without tools."),
+        MockAnthropicResponse("Answer with tools."),
+    ]
+
+    first = ai_generator.generate_response("What is ML?")
+    second = ai_generator.generate_response("Explain ML", tools=SEARCH_TOOLS)
+
+    assert (first, second) == ("Answer without tools.", "Answer with tools.")
+    assert mock_client.messages.create.call_count == 2
+    assert ai_generator.semantic_cache.ttl_seconds == 30
+
+
+def test_semantic_cache_matches_on_user_query(ai_generator, mock_client):
+    """Test different short questions behind one prompt prefix don't share answers"""
+    prefix = "Answer this question about course materials: "
+    vectors = {"What is MCP?": [1.0, 0.0], "What is RAG?": [0.0, 1.0]}
+
+    def embed(texts):
+        # Stand-in for a model where the long shared prefix dominates
+        return [[0.7, 0.7] if t.startswith(prefix) else vectors[t] for t in texts]
+
+    with (
+        patch("ai_generator.anthropic.Anthropic") as mock_anthropic,
+        patch.dict("ai_generator._CLIENTS", clear=True),
+    ):
+        mock_anthropic.return_value = mock_client
+        ai_generator = AIGenerator(API_KEY, MODEL, embedding_function=embed)
+    mock_client.messages.create.side_effect = [
+        MockAnthropicResponse("MCP answer."),
+        MockAnthropicResponse("RAG answer."),
+    ]
+
+    first = ai_generator.generate_response(
+        prefix + "What is MCP?", user_query="What is MCP?"
+    )
+    second = ai_generator.generate_response(
+        prefix + "What is RAG?", user_query="What is RAG?"
+    )
+
+    assert (first, second) == ("MCP answer.", "RAG answer.")
+    assert mock_client.messages.create.call_count == 2
+
+
+def test_concurrent_identical_requests_share_one_call(ai_generator, mock_client):
+    """Test identical in-flight requests share one execution and its sources"""
+    # Disable the response cache so only in-flight deduplication applies
+    ai_generator.response_cache.max_size = 0
+    started = threading.Event()
+    joined = threading.Event()
+    sources = [{"text": "Course A - Lesson 1", "link": None}]
+
+    class WatchedCalls(dict):
+        """In-flight call map that signals when a caller joins an existing call"""
+
+        def get(self, key, default=None):
+            found = super().get(key, default)
+            if found is not None:
+                joined.set()
+            return found
+
+    responses = iter(
+        [
+            tool_use_response("search_course_content", {"query": "Q"}),
+            MockAnthropicResponse("Shared answer."),
         ]
+    )
 
-        # Mock tool manager
-        mock_tool_manager = Mock()
-        mock_tool_manager.execute_tool.side_effect = [
-            "Course X outline",
-            "ML content found",
-        ]
+    def blocking_create(**kwargs):
+        # Hold the first call open until the second caller is waiting on it
+        started.set()
+        joined.wait(timeout=5)
+        return next(responses)
 
-        tools = [
-            {"name": "get_course_outline", "description": "Get course outline"},
-            {"name": "search_course_content", "description": "Search course content"},
-        ]
+    def execute_tool(name, **kwargs):
+        record_sources(sources)
+        return "Search result"
 
-        result = self.ai_generator.generate_response(
-            "Compare lesson 4 of course X with ML topics",
-            tools=tools,
-            tool_manager=mock_tool_manager,
-        )
+    mock_client.messages.create.side_effect = blocking_create
+    tool_manager = make_tool_manager()
+    tool_manager.execute_tool.side_effect = execute_tool
 
-        self.assertEqual(
-            result, "Based on both searches, here is the comprehensive answer."
-        )
+    results = []
 
-        # Verify both tools were executed in sequence
-        self.assertEqual(mock_tool_manager.execute_tool.call_count, 2)
-        mock_tool_manager.execute_tool.assert_any_call(
-            "get_course_outline", course_name="course_x"
-        )
-        mock_tool_manager.execute_tool.assert_any_call(
-            "search_course_content", query="machine learning"
+    def ask():
+        with collect_sources() as found:
+            answer = ai_generator.generate_response(
+                "Q?", tools=SEARCH_TOOLS, tool_manager=tool_manager
+            )
+        results.append((answer, found))
+
+    threads = [threading.Thread(target=ask) for _ in range(2)]
+    with patch.object(ai_generator._inflight, "_calls", WatchedCalls()):
+        threads[0].start()
+        started.wait(timeout=5)
+        threads[1].start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+    assert joined.is_set()
+
+    assert results == [("Shared answer.", sources), ("Shared answer.", sources)]
+    assert mock_client.messages.create.call_count == 2
+    tool_manager.execute_tool.assert_called_once()
+
+
+def test_generate_response_builds_cache_key_once(ai_generator, mock_client):
+    """Test single-flight and the response cache share one computed key"""
+    mock_client.messages.create.return_value = MockAnthropicResponse("Answer.")
+
+    with patch(
+        "ai_generator.ResponseCache.make_key", wraps=ResponseCache.make_key
+    ) as make_key:
+        ai_generator.generate_response("What is AI?", tools=SEARCH_TOOLS)
+
+    make_key.assert_called_once()
+
+
+def test_generate_response_with_tool_use_not_cached(ai_generator, mock_client):
+    """Test answers that required tool execution are not cached"""
+    tool_use_content = MockToolUseContent(
+        "search_course_content", {"query": "machine learning"}
+    )
+    mock_client.messages.create.side_effect = [
+        MockAnthropicResponse([tool_use_content], stop_reason="tool_use"),
+        MockAnthropicResponse("Answer from search."),
+        MockAnthropicResponse([tool_use_content], stop_reason="tool_use"),
+        MockAnthropicResponse("Answer from search."),
+    ]
+    mock_tool_manager = make_tool_manager()
+    mock_tool_manager.execute_tool.return_value = "Search result"
+
+    for _ in range(2):
+        ai_generator.generate_response(
+            "What is ML?", tools=SEARCH_TOOLS, tool_manager=mock_tool_manager
         )
 
-        # Verify three API calls were made (2 rounds + final)
-        self.assertEqual(self.mock_client.messages.create.call_count, 3)
+    assert mock_tool_manager.execute_tool.call_count == 2
+    assert mock_client.messages.create.call_count == 4
+
+
+def batch_entry(custom_id, message):
+    """Return a succeeded Message Batches result entry holding message"""
+    return Mock(custom_id=custom_id, result=Mock(type="succeeded", message=message))
+
+
+def test_generate_response_batch(ai_generator, mock_client):
+    """Test batched generation polls the batch and returns answers in order"""
+    batches = mock_client.messages.batches
+    batches.create.return_value = Mock(id="batch_1", processing_status="in_progress")
+    batches.retrieve.return_value = Mock(id="batch_1", processing_status="ended")
+
+    batches.results.return_value = [
+        batch_entry("query-1", MockAnthropicResponse("Answer two", usage=BATCH_USAGE)),
+        batch_entry("query-0", MockAnthropicResponse("Answer one", usage=BATCH_USAGE)),
+        Mock(custom_id="query-2", result=Mock(type="errored")),
+    ]
+
+    with patch("ai_generator.time.sleep") as mock_sleep:
+        result = ai_generator.generate_response_batch(["Q1", "Q2", "Q3"])
+
+    assert result == [
+        "Answer one",
+        "Answer two",
+        "I encountered an error while processing your request.",
+    ]
+    mock_sleep.assert_called_once()
+    assert batches.retrieve.call_args_list == [call("batch_1")]
+
+    requests = batches.create.call_args[1]["requests"]
+    assert [r["custom_id"] for r in requests] == ["query-0", "query-1", "query-2"]
+    assert requests[0]["params"]["messages"] == [
+        {"role": "user", "content": [{"type": "text", "text": "Q1"}]}
+    ]
+
+    # Batched usage counts in the totals
+    assert ai_generator.usage_tracker.totals["requests"] == 2
+    assert ai_generator.usage_tracker.totals["input_tokens"] == 200
+
+
+def test_generate_response_batch_continues_tool_use(ai_generator, mock_client):
+    """Test a batched tool_use response runs its tools, then only synthesis"""
+    batches = mock_client.messages.batches
+    batches.create.return_value = Mock(id="batch_1", processing_status="ended")
+    batched_tool_use = MockAnthropicResponse(
+        [MockToolUseContent("search_course_content", {"query": "ML"}, "tool_1")],
+        stop_reason="tool_use",
+        usage=BATCH_USAGE,
+    )
+    batches.results.return_value = [
+        batch_entry("query-0", batched_tool_use),
+        batch_entry("query-1", MockAnthropicResponse("Answer two")),
+    ]
+    mock_client.messages.create.return_value = MockAnthropicResponse("Final answer.")
+    tool_manager = make_tool_manager()
+    tool_manager.execute_tool.return_value = "Lesson content"
+
+    result = ai_generator.generate_response_batch(
+        ["What is ML?", "Q2"], tools=SEARCH_TOOLS, tool_manager=tool_manager
+    )
+
+    assert result == ["Final answer.", "Answer two"]
+    assert tool_manager.execute_tool.call_args_list == [
+        call("search_course_content", query="ML")
+    ]
+
+    # Round 1 is not asked again: the one synchronous call is the synthesis
+    mock_client.messages.create.assert_called_once()
+    final_params = mock_client.messages.create.call_args.kwargs
+    assert "tools" not in final_params
+    assert final_params["messages"][1:] == [
+        {"role": "assistant", "content": [batched_tool_use.content[0].model_dump()]},
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "tool_result",
+                    "tool_use_id": "tool_1",
+                    "content": "Lesson content",
+                }
+            ],
+        },
+    ]
+    assert ai_generator.usage_tracker.totals["input_tokens"] == 100
+
+
+def test_generate_response_batch_requires_tool_manager(ai_generator, mock_client):
+    """Test tools without a manager are rejected before anything is submitted"""
+    with pytest.raises(ValueError, match="tool_manager"):
+        ai_generator.generate_response_batch(["Q1"], tools=SEARCH_TOOLS)
+
+    mock_client.messages.batches.create.assert_not_called()
+
+
+def test_generate_response_batch_timeout(ai_generator, mock_client):
+    """Test a batch still running at the deadline is cancelled"""
+    batches = mock_client.messages.batches
+    batches.create.return_value = Mock(id="batch_1", processing_status="in_progress")
+    batches.retrieve.return_value = Mock(id="batch_1", processing_status="in_progress")
+    clock = [1000.0]
+
+    def fake_sleep(seconds):
+        clock[0] += seconds
+
+    with (
+        patch("ai_generator.time.monotonic", side_effect=lambda: clock[0]),
+        patch("ai_generator.time.sleep", side_effect=fake_sleep) as mock_sleep,
+        pytest.raises(TimeoutError, match="batch_1"),
+    ):
+        ai_generator.generate_response_batch(["Q1"], timeout=10)
+
+    # Backoff of 1, 2 and 4 seconds, then the last 3 seconds before the deadline
+    assert mock_sleep.call_args_list == [call(1.0), call(2.0), call(4.0), call(3.0)]
+    batches.cancel.assert_called_once_with("batch_1")
+
+
+def test_usage_recorded_for_each_api_call(ai_generator, mock_client):
+    """Test token usage (including prompt cache reads) is accumulated"""
+    mock_response = MockAnthropicResponse("Answer.")
+    mock_response.usage = Mock(
+        input_tokens=100,
+        output_tokens=20,
+        cache_creation_input_tokens=0,
+        cache_read_input_tokens=1500,
+    )
+    mock_client.messages.create.return_value = mock_response
+
+    ai_generator.generate_response("What is AI?")
+
+    totals = ai_generator.usage_tracker.totals
+    assert totals["requests"] == 1
+    assert totals["input_tokens"] == 100
+    assert totals["output_tokens"] == 20
+    assert totals["cache_read_input_tokens"] == 1500
+
+
+def test_rate_limit_waits_for_window():
+    """Test acquire blocks once the requests-per-minute limit is reached"""
+    tracker = UsageTracker(max_rpm=1)
+    clock = [1000.0]
+
+    def fake_sleep(seconds):
+        clock[0] += seconds
+
+    with (
+        patch("usage_tracker.time.monotonic", side_effect=lambda: clock[0]),
+        patch("usage_tracker.time.sleep", side_effect=fake_sleep) as mock_sleep,
+    ):
+        tracker.acquire()
+        tracker.acquire()
+
+    assert mock_sleep.call_args_list == [call(UsageTracker.WINDOW_SECONDS)]
+
+
+def test_usage_window_stays_bounded():
+    """Test recorded usage only stays in the window while it can affect limits"""
+    usage = SimpleNamespace(input_tokens=10, output_tokens=5)
+    unlimited = UsageTracker()
+    limited = UsageTracker(max_tpm=1000)
+    clock = [1000.0]
+
+    with patch("usage_tracker.time.monotonic", side_effect=lambda: clock[0]):
+        for _ in range(100):
+            unlimited.record(usage)
+            limited.record(usage)
+            clock[0] += UsageTracker.WINDOW_SECONDS / 10
+
+    assert unlimited.totals["requests"] == 100
+    assert len(unlimited._tokens) == 0
+    assert len(limited._tokens) <= 10
+
+
+@pytest.mark.skipif(FAST, reason="covered by public-API tests in fast mode")
+def test_handle_tool_execution_single_tool(ai_generator, mock_client):
+    """Test _handle_tool_execution with single tool call"""
+    # Setup initial response with tool use
+    mock_initial_response = tool_use_response(
+        "test_tool", {"param": "value"}, "tool_123"
+    )
+
+    # Mock tool manager
+    mock_tool_manager = make_tool_manager()
+    mock_tool_manager.execute_tool.return_value = "Tool execution result"
+
+    # Mock final response
+    mock_final_response = MockAnthropicResponse("Final response with tool results")
+    mock_client.messages.create.return_value = mock_final_response
+
+    # Execute
+    result = ai_generator._handle_tool_execution(
+        mock_initial_response, BASE_PARAMS, mock_tool_manager
+    )
 
-    def test_sequential_termination_max_rounds(self):
-        """Test that sequential calling stops after 2 rounds"""
-        # Mock responses for both rounds with tool use
-        tool_use_1 = MockToolUseContent(
-            "search_course_content", {"query": "topic1"}, "tool_1"
-        )
-        tool_use_2 = MockToolUseContent(
-            "search_course_content", {"query": "topic2"}, "tool_2"
+    assert result == "Final response with tool results"
+
+    # Verify tool execution
+    assert mock_tool_manager.execute_tool.call_args_list == [
+        call("test_tool", param="value")
+    ]
+
+    # Verify final API call
+    final_call_args = mock_client.messages.create.call_args[1]
+    assert len(final_call_args["messages"]) == 3  # original + assistant + tool_result
+
+    # Check tool result message format
+    tool_result_msg = final_call_args["messages"][2]
+    assert tool_result_msg["role"] == "user"
+    assert len(tool_result_msg["content"]) == 1
+    assert tool_result_msg["content"][0]["type"] == "tool_result"
+    assert tool_result_msg["content"][0]["tool_use_id"] == "tool_123"
+    assert tool_result_msg["content"][0]["content"] == "Tool execution result"
+
+
+@pytest.mark.skipif(FAST, reason="covered by public-API tests in fast mode")
+def test_handle_tool_execution_multiple_tools(ai_generator, mock_client):
+    """Test _handle_tool_execution with multiple tool calls"""
+    # Setup initial response with multiple tool uses
+    tool_use_1 = MockToolUseContent("tool_1", {"param1": "value1"}, "tool_123")
+    tool_use_2 = MockToolUseContent("tool_2", {"param2": "value2"}, "tool_456")
+    mock_initial_response = MockAnthropicResponse(
+        [tool_use_1, tool_use_2], stop_reason="tool_use"
+    )
+
+    # Fake tool manager
+    tool_manager = FakeToolManager(["Result 1", "Result 2"])
+
+    # Mock final response
+    mock_final_response = MockAnthropicResponse(
+        "Final response with multiple tool results"
+    )
+    mock_client.messages.create.return_value = mock_final_response
+
+    # Execute
+    result = ai_generator._handle_tool_execution(
+        mock_initial_response, BASE_PARAMS, tool_manager
+    )
+
+    assert result == "Final response with multiple tool results"
+
+    # Verify both tools were executed, in content block order
+    assert tool_manager.calls == [
+        ("tool_1", {"param1": "value1"}),
+        ("tool_2", {"param2": "value2"}),
+    ]
+
+    # Verify final API call has the tool results in tool_use order
+    final_call_args = mock_client.messages.create.call_args[1]
+    tool_result_msg = final_call_args["messages"][2]
+    assert [block["tool_use_id"] for block in tool_result_msg["content"]] == [
+        "tool_123",
+        "tool_456",
+    ]
+
+
+def test_system_prompt_content():
+    """Test that system prompt contains expected content"""
+    # Check for key elements in a single scan of the prompt
+    found = set(_SYSTEM_PROMPT_RE.findall(AIGenerator.SYSTEM_PROMPT))
+    assert found == set(_SYSTEM_PROMPT_TERMS)
+
+
+def test_api_error_handling(ai_generator, mock_client):
+    """Test handling of API errors"""
+    mock_client.messages.create.side_effect = Exception("API Error")
+
+    with pytest.raises(Exception) as context:
+        ai_generator.generate_response("Test query")
+
+    assert str(context.value) == "API Error"
+
+
+@pytest.mark.skipif(FAST, reason="covered by public-API tests in fast mode")
+def test_empty_tool_results_handling(ai_generator, mock_client):
+    """Test handling when no tool results are generated"""
+    # Mock response with tool use but no actual tool use content
+    mock_response = MockAnthropicResponse([], stop_reason="tool_use")
+
+    mock_tool_manager = make_tool_manager()
+
+    # Mock final response
+    mock_final_response = MockAnthropicResponse("Response with no tools")
+    mock_client.messages.create.return_value = mock_final_response
+
+    result = ai_generator._handle_tool_execution(
+        mock_response, BASE_PARAMS, mock_tool_manager
+    )
+
+    assert result == "Response with no tools"
+
+    # Verify no tools were executed
+    mock_tool_manager.execute_tool.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "responses, tool_results, expected_answer, expected_api_calls, expected_tool_calls",
+    [
+        pytest.param(
+            [
+                tool_use_response(
+                    "get_course_outline", {"course_name": "course_x"}, "tool_1"
+                ),
+                tool_use_response(
+                    "search_course_content", {"query": "machine learning"}, "tool_2"
+                ),
+                MockAnthropicResponse(
+                    "Based on both searches, here is the comprehensive answer."
+                ),
+            ],
+            ["Course X outline", "ML content found"],
+            "Based on both searches, here is the comprehensive answer.",
+            3,
+            [
+                ("get_course_outline", {"course_name": "course_x"}),
+                ("search_course_content", {"query": "machine learning"}),
+            ],
+            id="two_rounds",
+        ),
+        pytest.param(
+            [
+                tool_use_response("search_course_content", {"query": "topic1"}, "t1"),
+                tool_use_response("search_course_content", {"query": "topic2"}, "t2"),
+                MockAnthropicResponse("Final answer after max rounds."),
+            ],
+            ["Result 1", "Result 2"],
+            "Final answer after max rounds.",
+            3,
+            [
+                ("search_course_content", {"query": "topic1"}),
+                ("search_course_content", {"query": "topic2"}),
+            ],
+            id="max_rounds",
+        ),
+        pytest.param(
+            [MockAnthropicResponse("Direct answer without tools needed.")],
+            [],
+            "Direct answer without tools needed.",
+            1,
+            [],
+            id="no_tools",
+        ),
+    ],
+)
+def test_sequential_tool_rounds(
+    ai_generator,
+    mock_client,
+    responses,
+    tool_results,
+    expected_answer,
+    expected_api_calls,
+    expected_tool_calls,
+):
+    """Test sequential tool calling runs at most 2 rounds, then answers without tools"""
+    mock_client.messages.create.side_effect = responses
+    tool_manager = FakeToolManager(tool_results)
+
+    result = ai_generator.generate_response(
+        "Compare lesson 4 of course X with ML topics",
+        tools=OUTLINE_SEARCH_TOOLS,
+        tool_manager=tool_manager,
+        force_single_round=False,
+    )
+
+    assert result == expected_answer
+    assert tool_manager.calls == expected_tool_calls
+    assert mock_client.messages.create.call_count == expected_api_calls
+
+    # The call after the last tool round is made without tools
+    if expected_tool_calls:
+        final_call_args = mock_client.messages.create.call_args_list[-1][1]
+        assert "tools" not in final_call_args
+
+
+@pytest.mark.parametrize(
+    "query, course, topic",
+    [
+        (
+            "Compare lesson 2 of Advanced Retrieval for AI with Chroma "
+            "with similar topics?",
+            "Advanced Retrieval for AI with Chroma",
+            "similar topics",
+        ),
+        (
+            "Compare lesson 4 of the MCP: Build Rich-Context AI Apps with Anthropic "
+            "course with retrieval topics",
+            "MCP: Build Rich-Context AI Apps with Anthropic",
+            "retrieval topics",
+        ),
+        (
+            "Find courses similar to lesson 1 of Prompt Compression and Query "
+            "Optimization and RAG evaluation",
+            "Prompt Compression and Query Optimization",
+            "RAG evaluation",
+        ),
+    ],
+    ids=["with_in_title", "course_suffix", "and_in_title"],
+)
+def test_parallel_prefetch_for_outline_and_content_query(
+    ai_generator, mock_client, query, course, topic
+):
+    """Test outline+content queries run both tools before the first API call"""
+    mock_client.messages.create.return_value = MockAnthropicResponse("Compared.")
+    mock_tool_manager = make_tool_manager()
+    mock_tool_manager.execute_tool.side_effect = lambda name, **kwargs: f"{name} result"
+    ai_generator.parallel_prefetch = True
+    ai_generator.course_titles = lambda: COURSE_TITLES
+
+    result = ai_generator.generate_response(
+        query, tools=OUTLINE_SEARCH_TOOLS, tool_manager=mock_tool_manager
+    )
+
+    assert result == "Compared."
+    assert calls_as_set(mock_tool_manager.execute_tool) == {
+        (("get_course_outline",), (("course_title", course),)),
+        (("search_course_content",), (("query", topic),)),
+    }
+
+    # A single API call sees the synthetic tool turn
+    mock_client.messages.create.assert_called_once()
+    messages = mock_client.messages.create.call_args[1]["messages"]
+    assert [m["role"] for m in messages] == ["user", "assistant", "user"]
+    assert [b["tool_use_id"] for b in messages[2]["content"]] == [
+        b["id"] for b in messages[1]["content"]
+    ]
+
+
+@pytest.mark.parametrize(
+    "parallel_prefetch, query",
+    [
+        (False, "Compare lesson 2 of Advanced Retrieval for AI with Chroma with RAG"),
+        (True, "What is in lesson 2 of Advanced Retrieval for AI with Chroma?"),
+        (True, "Compare lesson 3 of MCP: Build Rich-Context AI Apps with Anthropic"),
+        (True, "Compare lesson 1 of Prompt Compression with query optimization"),
+    ],
+    ids=["not_opted_in", "single_step", "no_topic", "unknown_course"],
+)
+def test_no_parallel_prefetch(ai_generator, mock_client, parallel_prefetch, query):
+    """Test the prefetch stays off unless it is enabled and the query is unambiguous"""
+    mock_client.messages.create.return_value = MockAnthropicResponse("Answer.")
+    mock_tool_manager = make_tool_manager()
+    ai_generator.parallel_prefetch = parallel_prefetch
+    ai_generator.course_titles = lambda: COURSE_TITLES
+
+    ai_generator.generate_response(
+        query, tools=OUTLINE_SEARCH_TOOLS, tool_manager=mock_tool_manager
+    )
+
+    mock_tool_manager.execute_tool.assert_not_called()
+    messages = mock_client.messages.create.call_args[1]["messages"]
+    assert len(messages) == 1
+
+
+def test_final_call_compacts_large_tool_results(ai_generator, mock_client):
+    """Test oversized tool output is trimmed to whole hits before synthesis"""
+    mock_client.messages.create.side_effect = [
+        tool_use_response("search_course_content", {"query": "a"}, "t1"),
+        tool_use_response("search_course_content", {"query": "b"}, "t2"),
+        MockAnthropicResponse("Final answer."),
+    ]
+
+    hit = "[Course - Lesson 1]\n" + "x" * 1500
+    tool_manager = FakeToolManager(["\n\n".join([hit] * 4), "short"])
+
+    ai_generator.generate_response(
+        "Query",
+        tools=SEARCH_TOOLS,
+        tool_manager=tool_manager,
+        force_single_round=False,
+    )
+
+    final_messages = mock_client.messages.create.call_args[1]["messages"]
+    compacted = final_messages[2]["content"][0]["content"]
+    assert compacted == "\n\n".join([hit] * 2)
+    assert len(compacted) <= AIGenerator.MAX_TOOL_RESULT_CHARS
+    assert final_messages[4]["content"][0]["content"] == "short"
+
+
+def test_generate_response_stream_final_call(ai_generator, mock_client):
+    """Test the synthesis call after tool rounds is streamed"""
+    mock_client.messages.create.side_effect = [
+        tool_use_response("search_course_content", {"query": "a"}, "t1"),
+        tool_use_response("search_course_content", {"query": "b"}, "t2"),
+    ]
+    mock_client.messages.stream.return_value = MagicMock()
+    stream = mock_client.messages.stream.return_value.__enter__.return_value
+    stream.text_stream = iter(["Final ", "answer."])
+
+    mock_tool_manager = make_tool_manager()
+    mock_tool_manager.execute_tool.return_value = "Result"
+
+    chunks = list(
+        ai_generator.generate_response_stream(
+            "Query",
+            tools=SEARCH_TOOLS,
+            tool_manager=mock_tool_manager,
+            force_single_round=False,
         )
+    )
 
-        mock_response_1 = MockAnthropicResponse([tool_use_1], stop_reason="tool_use")
-        mock_response_2 = MockAnthropicResponse([tool_use_2], stop_reason="tool_use")
-        mock_final_response = MockAnthropicResponse("Final answer after max rounds.")
+    assert chunks == ["Final ", "answer."]
+    assert mock_client.messages.create.call_count == 2
+    assert "tools" not in mock_client.messages.stream.call_args[1]
 
-        self.mock_client.messages.create.side_effect = [
-            mock_response_1,
-            mock_response_2,
-            mock_final_response,
-        ]
 
-        mock_tool_manager = Mock()
-        mock_tool_manager.execute_tool.side_effect = ["Result 1", "Result 2"]
+def test_generate_response_stream_direct_answer(ai_generator, mock_client):
+    """Test a direct answer without tool use is yielded as one chunk"""
+    mock_client.messages.create.return_value = MockAnthropicResponse("Direct answer.")
 
-        tools = [{"name": "search_course_content", "description": "Search content"}]
+    chunks = list(ai_generator.generate_response_stream("What is AI?"))
+
+    assert chunks == ["Direct answer."]
+    mock_client.messages.stream.assert_not_called()
 
-        result = self.ai_generator.generate_response(
-            "Complex query requiring multiple searches",
-            tools=tools,
-            tool_manager=mock_tool_manager,
-        )
 
-        self.assertEqual(result, "Final answer after max rounds.")
+def test_simple_query_drops_tools_after_first_round(ai_generator, mock_client):
+    """Test tools are withheld in round 2 for queries that are not multi-step"""
+    mock_client.messages.create.side_effect = [
+        tool_use_response("search_course_content", {"query": "ml"}, "tool_1"),
+        MockAnthropicResponse("Answer from round one results."),
+    ]
+    mock_tool_manager = make_tool_manager()
+    mock_tool_manager.execute_tool.return_value = "ML content"
+
+    result = ai_generator.generate_response(
+        "What is machine learning?", tools=SEARCH_TOOLS, tool_manager=mock_tool_manager
+    )
 
-        # Verify exactly 2 tool executions
-        self.assertEqual(mock_tool_manager.execute_tool.call_count, 2)
+    assert result == "Answer from round one results."
+    second_call_args = mock_client.messages.create.call_args_list[1][1]
+    assert "tools" not in second_call_args
+    assert "tool_choice" not in second_call_args
 
-        # Verify exactly 3 API calls (2 rounds + final without tools)
-        self.assertEqual(self.mock_client.messages.create.call_count, 3)
 
-        # Verify final call has no tools
-        final_call_args = self.mock_client.messages.create.call_args_list[2][1]
-        self.assertNotIn("tools", final_call_args)
+def test_multi_step_query_keeps_tools_for_second_round(ai_generator, mock_client):
+    """Test comparison queries keep tools available in round 2"""
+    mock_client.messages.create.side_effect = [
+        tool_use_response("search_course_content", {"query": "a"}, "tool_1"),
+        MockAnthropicResponse("Comparison answer."),
+    ]
+    mock_tool_manager = make_tool_manager()
+    mock_tool_manager.execute_tool.return_value = "Content"
 
-    def test_sequential_termination_no_tools(self):
-        """Test that sequential calling stops when Claude doesn't use tools"""
-        # Mock first round response without tool use
-        mock_response = MockAnthropicResponse("Direct answer without tools needed.")
-        self.mock_client.messages.create.return_value = mock_response
+    ai_generator.generate_response(
+        "Compare approach A and B", tools=SEARCH_TOOLS, tool_manager=mock_tool_manager
+    )
 
-        mock_tool_manager = Mock()
-        tools = [{"name": "search_course_content", "description": "Search content"}]
+    second_call_args = mock_client.messages.create.call_args_list[1][1]
+    assert "tools" in second_call_args
 
-        result = self.ai_generator.generate_response(
-            "Simple question", tools=tools, tool_manager=mock_tool_manager
-        )
 
-        self.assertEqual(result, "Direct answer without tools needed.")
+def test_sequential_tool_failure_handling(ai_generator, mock_client, monkeypatch):
+    """Test handling of tool execution failures in sequential calling"""
+    # Mock tool use response
+    mock_response = tool_use_response(
+        "search_course_content", {"query": "test"}, "tool_1"
+    )
+
+    # Mock tool manager that returns None (simulates _execute_tools_for_round returning None)
+    mock_tool_manager = make_tool_manager()
+    mock_tool_manager.execute_tool.side_effect = Exception("Tool execution failed")
 
-        # Verify no tools were executed
-        mock_tool_manager.execute_tool.assert_not_called()
+    # Make _execute_tools_for_round return None on failure
+    monkeypatch.setattr(
+        ai_generator, "_execute_tools_for_round", lambda *args, **kwargs: None
+    )
+    mock_client.messages.create.return_value = mock_response
 
-        # Verify only one API call was made
-        self.assertEqual(self.mock_client.messages.create.call_count, 1)
+    result = ai_generator.generate_response(
+        "Query that causes tool failure",
+        tools=SEARCH_TOOLS,
+        tool_manager=mock_tool_manager,
+    )
+
+    assert result == "I encountered an error while processing your request."
 
-    def test_sequential_tool_failure_handling(self):
-        """Test handling of tool execution failures in sequential calling"""
-        # Mock tool use response
-        tool_use_content = MockToolUseContent(
-            "search_course_content", {"query": "test"}, "tool_1"
-        )
-        mock_response = MockAnthropicResponse(
-            [tool_use_content], stop_reason="tool_use"
-        )
+    # Verify only one API call was made (before failure)
+    assert mock_client.messages.create.call_count == 1
+
+
+def test_conversation_context_preservation(ai_generator, mock_client):
+    """Test that conversation context is preserved between rounds"""
+    # Mock two rounds of tool calling
+    mock_response_1 = tool_use_response(
+        "get_course_outline", {"course_name": "test"}, "tool_1"
+    )
+    mock_response_2 = tool_use_response(
+        "search_course_content", {"query": "ml"}, "tool_2"
+    )
+    mock_final = MockAnthropicResponse("Final response with context.")
 
-        # Mock tool manager that returns None (simulates _execute_tools_for_round returning None)
-        mock_tool_manager = Mock()
-        mock_tool_manager.execute_tool.side_effect = Exception("Tool execution failed")
+    # Capture a shallow copy of the messages at call time, since the list
+    # grows in place between rounds
+    responses = iter([mock_response_1, mock_response_2, mock_final])
+    captured = []
 
-        # Mock the _execute_tools_for_round to return None on failure
-        with patch.object(
-            self.ai_generator, "_execute_tools_for_round", return_value=None
-        ):
-            self.mock_client.messages.create.return_value = mock_response
+    def record(**kwargs):
+        captured.append(list(kwargs["messages"]))
+        return next(responses)
 
-            tools = [{"name": "search_course_content", "description": "Search content"}]
+    # The mock_client fixture resets the shared mock, so no fresh client is needed
+    mock_client.messages.create.side_effect = record
 
-            result = self.ai_generator.generate_response(
-                "Query that causes tool failure",
-                tools=tools,
-                tool_manager=mock_tool_manager,
-            )
+    tool_manager = FakeToolManager(["Outline result", "Search result"])
 
-            self.assertEqual(
-                result, "I encountered an error while processing your request."
-            )
+    result = ai_generator.generate_response(
+        "Test query",
+        tools=OUTLINE_SEARCH_TOOLS,
+        tool_manager=tool_manager,
+        force_single_round=False,
+    )
+
+    assert result == "Final response with context."
 
-            # Verify only one API call was made (before failure)
-            self.assertEqual(self.mock_client.messages.create.call_count, 1)
+    # 3 API calls (2 rounds + final), each adding an assistant + tool_result turn
+    assert [len(messages) for messages in captured] == [1, 3, 5]
+
+    # Final call: full conversation context (user + assistant + user + assistant + user)
+    assert [msg["role"] for msg in captured[2]] == [
+        "user",
+        "assistant",
+        "user",
+        "assistant",
+        "user",
+    ]
 
-    def test_conversation_context_preservation(self):
-        """Test that conversation context is preserved between rounds"""
-        # Create a fresh mock client to avoid state leakage
-        fresh_mock_client = Mock()
 
-        # Mock two rounds of tool calling
-        tool_use_1 = MockToolUseContent(
-            "get_course_outline", {"course_name": "test"}, "tool_1"
-        )
-        tool_use_2 = MockToolUseContent(
-            "search_course_content", {"query": "ml"}, "tool_2"
-        )
+def test_execute_tools_for_round_single_tool(ai_generator):
+    """Test _execute_tools_for_round method with single tool"""
+    mock_response = tool_use_response("test_tool", {"param": "value"}, "tool_123")
 
-        mock_response_1 = MockAnthropicResponse([tool_use_1], stop_reason="tool_use")
-        mock_response_2 = MockAnthropicResponse([tool_use_2], stop_reason="tool_use")
-        mock_final = MockAnthropicResponse("Final response with context.")
+    mock_tool_manager = make_tool_manager()
+    mock_tool_manager.execute_tool.return_value = "Tool execution result"
 
-        fresh_mock_client.messages.create.side_effect = [
-            mock_response_1,
-            mock_response_2,
-            mock_final,
-        ]
+    result = ai_generator._execute_tools_for_round(mock_response, mock_tool_manager, 1)
+
+    assert result is not None
+    assert len(result) == 1
+    assert result[0]["type"] == "tool_result"
+    assert result[0]["tool_use_id"] == "tool_123"
+    assert result[0]["content"] == "Tool execution result"
 
-        # Create a fresh AIGenerator instance
-        with patch("ai_generator.anthropic.Anthropic") as mock_anthropic:
-            mock_anthropic.return_value = fresh_mock_client
-            fresh_ai_generator = AIGenerator(self.api_key, self.model)
+    # Verify tool was executed
+    assert mock_tool_manager.execute_tool.call_args_list == [
+        call("test_tool", param="value")
+    ]
 
-        mock_tool_manager = Mock()
-        mock_tool_manager.execute_tool.side_effect = ["Outline result", "Search result"]
 
-        tools = [{"name": "get_course_outline"}, {"name": "search_course_content"}]
+def test_execute_tools_for_round_multiple_tools_preserves_order(ai_generator):
+    """Test _execute_tools_for_round runs several tools and keeps their order"""
+    tool_use_1 = MockToolUseContent("tool_1", {"param": "a"}, "tool_123")
+    tool_use_2 = MockToolUseContent("tool_2", {"param": "b"}, "tool_456")
+    mock_response = MockAnthropicResponse(
+        [tool_use_1, tool_use_2], stop_reason="tool_use"
+    )
 
-        result = fresh_ai_generator.generate_response(
-            "Test query", tools=tools, tool_manager=mock_tool_manager
-        )
+    mock_tool_manager = make_tool_manager()
+    mock_tool_manager.execute_tool.side_effect = lambda name, **kwargs: f"{name} result"
 
-        # Verify the messages array grows with each round
-        api_calls = fresh_mock_client.messages.create.call_args_list
+    result = ai_generator._execute_tools_for_round(mock_response, mock_tool_manager, 1)
 
-        # Verify we made exactly 3 API calls (2 rounds + final)
-        self.assertEqual(len(api_calls), 3)
+    assert [r["tool_use_id"] for r in result] == ["tool_123", "tool_456"]
+    assert [r["content"] for r in result] == ["tool_1 result", "tool_2 result"]
+    assert mock_tool_manager.execute_tool.call_count == 2
 
-        # First call: just user message
-        first_messages = api_calls[0][1]["messages"]
-        self.assertEqual(
-            len(first_messages),
-            1,
-            f"Expected 1 message, got {len(first_messages)}: {first_messages}",
-        )
-        self.assertEqual(first_messages[0]["role"], "user")
-
-        # Second call: user + assistant + tool_result (from first round)
-        second_messages = api_calls[1][1]["messages"]
-        self.assertEqual(len(second_messages), 3)
-        self.assertEqual(second_messages[0]["role"], "user")  # Original query
-        self.assertEqual(
-            second_messages[1]["role"], "assistant"
-        )  # Tool use from round 1
-        self.assertEqual(
-            second_messages[2]["role"], "user"
-        )  # Tool results from round 1
-
-        # Final call: full conversation context (user + assistant + user + assistant + user)
-        final_messages = api_calls[2][1]["messages"]
-        self.assertEqual(len(final_messages), 5)
-        roles = [msg["role"] for msg in final_messages]
-        expected_roles = ["user", "assistant", "user", "assistant", "user"]
-        self.assertEqual(roles, expected_roles)
-
-    def test_execute_tools_for_round_single_tool(self):
-        """Test _execute_tools_for_round method with single tool"""
-        tool_use_content = MockToolUseContent(
-            "test_tool", {"param": "value"}, "tool_123"
-        )
-        mock_response = MockAnthropicResponse(
-            [tool_use_content], stop_reason="tool_use"
-        )
 
-        mock_tool_manager = Mock()
-        mock_tool_manager.execute_tool.return_value = "Tool execution result"
+def test_execute_tools_for_round_records_sources_for_caller(ai_generator):
+    """Test sources found on the tool threads reach the calling request"""
+    mock_response = MockAnthropicResponse(
+        [
+            MockToolUseContent("search", {}, "tool_123"),
+            MockToolUseContent("outline", {}, "tool_456"),
+        ],
+        stop_reason="tool_use",
+    )
 
-        result = self.ai_generator._execute_tools_for_round(
-            mock_response, mock_tool_manager, 1
-        )
+    def execute_tool(name, **kwargs):
+        if name == "search":
+            record_sources([{"text": "Course A", "link": None}])
+        return f"{name} result"
+
+    mock_tool_manager = make_tool_manager()
+    mock_tool_manager.execute_tool.side_effect = execute_tool
 
-        self.assertIsNotNone(result)
-        self.assertEqual(len(result), 1)
-        self.assertEqual(result[0]["type"], "tool_result")
-        self.assertEqual(result[0]["tool_use_id"], "tool_123")
-        self.assertEqual(result[0]["content"], "Tool execution result")
+    with collect_sources() as sources:
+        ai_generator._execute_tools_for_round(mock_response, mock_tool_manager, 1)
 
-        # Verify tool was executed
-        mock_tool_manager.execute_tool.assert_called_once_with(
-            "test_tool", param="value"
-        )
+    assert sources == [{"text": "Course A", "link": None}]
 
-    def test_execute_tools_for_round_error_handling(self):
-        """Test _execute_tools_for_round error handling"""
-        tool_use_content = MockToolUseContent(
-            "failing_tool", {"param": "value"}, "tool_123"
-        )
-        mock_response = MockAnthropicResponse(
-            [tool_use_content], stop_reason="tool_use"
-        )
 
-        mock_tool_manager = Mock()
-        mock_tool_manager.execute_tool.side_effect = Exception("Tool failed")
-
-        result = self.ai_generator._execute_tools_for_round(
-            mock_response, mock_tool_manager, 1
-        )
+def test_execute_tools_for_round_error_handling(ai_generator):
+    """Test _execute_tools_for_round error handling"""
+    mock_response = tool_use_response("failing_tool", {"param": "value"}, "tool_123")
 
-        self.assertIsNotNone(result)
-        self.assertEqual(len(result), 1)
-        self.assertEqual(result[0]["type"], "tool_result")
-        self.assertEqual(result[0]["tool_use_id"], "tool_123")
-        self.assertIn("Error executing failing_tool", result[0]["content"])
+    mock_tool_manager = make_tool_manager()
+    mock_tool_manager.execute_tool.side_effect = Exception("Tool failed")
 
+    result = ai_generator._execute_tools_for_round(mock_response, mock_tool_manager, 1)
 
-if __name__ == "__main__":
-    unittest.main()
+    assert result is not None
+    assert len(result) == 1
+    assert result[0]["type"] == "tool_result"
+    assert result[0]["tool_use_id"] == "tool_123"
+    assert "Error executing failing_tool" in result[0]["content"]
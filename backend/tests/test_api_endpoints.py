@@ -2,9 +2,17 @@
 API endpoint tests for the RAG system FastAPI application.
 """
 
+import json
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+
+# Constant request bodies, serialized once instead of on every post(json=...)
+JSON_HEADERS = {"Content-Type": "application/json"}
+QUERY_BODY = json.dumps({"query": "test query"}).encode()
+# 10KB query, assembled as bytes so the payload is never escape-scanned
+LARGE_QUERY_BODY = b'{"query": "' + b"x" * 10000 + b'"}'
+MISSING_QUERY_BODY = json.dumps({"session_id": "test_session"}).encode()
+MALFORMED_QUERY_BODY = json.dumps({"query": 123}).encode()  # query should be string
 
 
 @pytest.mark.api
@@ -21,9 +29,9 @@ class TestQueryEndpoint:
         assert response.status_code == 200
         data = response.json()
         
-        assert "answer" in data
-        assert "sources" in data
-        assert "session_id" in data
+        # Response matches QueryResponse exactly
+        assert set(data.keys()) == {"answer", "sources", "session_id"}
+        assert isinstance(data["answer"], str)
         assert data["session_id"] == sample_query_data["valid_query"]["session_id"]
         assert isinstance(data["sources"], list)
     
@@ -58,47 +66,95 @@ class TestQueryEndpoint:
         assert "sources" in data
         assert "session_id" in data
     
-    def test_query_missing_query_field(self, test_client: TestClient):
-        """Test query endpoint with missing query field."""
+    def test_query_rag_system_exception(self, test_client: TestClient, failing_rag):
+        """Test query endpoint when RAG system raises exception."""
         response = test_client.post(
             "/api/query",
-            json={"session_id": "test_session"}
+            content=QUERY_BODY,
+            headers=JSON_HEADERS
         )
         
-        assert response.status_code == 422  # Validation error
+        assert response.status_code == 500
+        assert "Database connection failed" in response.json()["detail"]
+
+
+def sse_events(response):
+    """Decode the JSON payloads of a server-sent events response body."""
+    return [
+        json.loads(block.removeprefix("data: "))
+        for block in response.text.split("\n\n")
+        if block
+    ]
+
+
+@pytest.mark.api
+class TestQueryStreamEndpoint:
+    """Test the /api/query/stream endpoint."""
     
-    def test_query_invalid_json(self, test_client: TestClient):
-        """Test query endpoint with invalid JSON."""
+    def test_stream_events(self, test_client: TestClient, app_rag_mock, sample_query_data):
+        """Test the stream sends the session, the answer chunks, then the sources."""
         response = test_client.post(
-            "/api/query",
-            data="invalid json"
+            "/api/query/stream",
+            json=sample_query_data["valid_query"]
         )
         
-        assert response.status_code == 422
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert sse_events(response) == [
+            {"type": "session", "session_id": "test_session_123"},
+            {"type": "chunk", "text": "Test "},
+            {"type": "chunk", "text": "response"},
+            {"type": "sources", "sources": ["Test source"]},
+        ]
+        app_rag_mock.query_stream.assert_called_once_with(
+            "What is machine learning?", "test_session_123"
+        )
     
-    def test_query_malformed_request(self, test_client: TestClient):
-        """Test query endpoint with malformed request body."""
+    def test_stream_creates_session(self, test_client: TestClient, app_rag_mock):
+        """Test the stream creates a session when none is given and sends it first."""
+        app_rag_mock.session_manager.create_session.return_value = "new_session"
+        
         response = test_client.post(
-            "/api/query",
-            json={"query": 123}  # query should be string
+            "/api/query/stream",
+            content=QUERY_BODY,
+            headers=JSON_HEADERS
         )
         
-        assert response.status_code == 422
+        events = sse_events(response)
+        assert events[0] == {"type": "session", "session_id": "new_session"}
+        app_rag_mock.query_stream.assert_called_once_with("test query", "new_session")
     
-    @patch('rag_system.RAGSystem')
-    def test_query_rag_system_exception(self, mock_rag_class, test_client: TestClient):
-        """Test query endpoint when RAG system raises exception."""
-        # Override the test app's mock to raise an exception
-        with patch('test_api_endpoints.mock_rag') as mock_rag:
-            mock_rag.query.side_effect = Exception("Database connection failed")
-            
-            response = test_client.post(
-                "/api/query",
-                json={"query": "test query"}
-            )
-            
-            assert response.status_code == 500
-            assert "Database connection failed" in response.json()["detail"]
+    def test_stream_error_event(self, test_client: TestClient, failing_rag, sample_query_data):
+        """Test a failing query ends the stream with an error event, not a 500."""
+        response = test_client.post(
+            "/api/query/stream",
+            json=sample_query_data["valid_query"]
+        )
+        
+        assert response.status_code == 200
+        assert sse_events(response) == [
+            {"type": "session", "session_id": "test_session_123"},
+            {"type": "error", "detail": "Database connection failed"},
+        ]
+    
+    def test_stream_error_after_chunks(self, test_client: TestClient, app_rag_mock, sample_query_data):
+        """Test an error mid-answer follows the chunks already sent."""
+        def query_stream(query, session_id):
+            yield {"type": "chunk", "text": "Partial"}
+            raise RuntimeError("Stream interrupted")
+        
+        app_rag_mock.query_stream.side_effect = query_stream
+        
+        response = test_client.post(
+            "/api/query/stream",
+            json=sample_query_data["valid_query"]
+        )
+        
+        assert sse_events(response) == [
+            {"type": "session", "session_id": "test_session_123"},
+            {"type": "chunk", "text": "Partial"},
+            {"type": "error", "detail": "Stream interrupted"},
+        ]
 
 
 @pytest.mark.api
@@ -112,35 +168,24 @@ class TestCoursesEndpoint:
         assert response.status_code == 200
         data = response.json()
         
-        assert "total_courses" in data
-        assert "course_titles" in data
-        assert isinstance(data["total_courses"], int)
-        assert isinstance(data["course_titles"], list)
-        assert data["total_courses"] >= 0
-    
-    def test_course_stats_response_structure(self, test_client: TestClient):
-        """Test that course stats response has correct structure."""
-        response = test_client.get("/api/courses")
-        
-        assert response.status_code == 200
-        data = response.json()
-        
         # Verify response matches CourseStats model
         assert set(data.keys()) == {"total_courses", "course_titles"}
         
         # Verify types
         assert isinstance(data["total_courses"], int)
         assert isinstance(data["course_titles"], list)
+        assert data["total_courses"] >= 0
         
         # Verify all course titles are strings
         for title in data["course_titles"]:
             assert isinstance(title, str)
     
-    @patch('rag_system.RAGSystem')
-    def test_courses_rag_system_exception(self, mock_rag_class, test_client: TestClient):
+    def test_courses_rag_system_exception(self, test_client: TestClient, failing_rag):
         """Test courses endpoint when RAG system raises exception."""
-        # This would require modifying the test app setup, but demonstrates the test pattern
-        pass
+        response = test_client.get("/api/courses")
+        
+        assert response.status_code == 500
+        assert "Analytics unavailable" in response.json()["detail"]
 
 
 @pytest.mark.api
@@ -162,21 +207,28 @@ class TestRootEndpoint:
 class TestRequestValidation:
     """Test request validation and error handling."""
     
-    def test_invalid_content_type(self, test_client: TestClient):
-        """Test endpoints with invalid content type."""
-        response = test_client.post(
-            "/api/query",
-            data="query=test",  # form data instead of JSON
-            headers={"Content-Type": "application/x-www-form-urlencoded"}
-        )
-        
-        assert response.status_code == 422
-    
-    def test_missing_content_type(self, test_client: TestClient):
-        """Test endpoints with missing content type header."""
-        response = test_client.post("/api/query")
-        
-        assert response.status_code == 422
+    @pytest.mark.parametrize("method,path,kwargs,status", [
+        pytest.param("post", "/api/query",
+                     {"content": MISSING_QUERY_BODY, "headers": JSON_HEADERS}, 422,
+                     id="missing_query_field"),
+        pytest.param("post", "/api/query", {"content": "invalid json"}, 422,
+                     id="invalid_json"),
+        pytest.param("post", "/api/query",
+                     {"content": MALFORMED_QUERY_BODY, "headers": JSON_HEADERS}, 422,
+                     id="malformed_request"),
+        # form data instead of JSON
+        pytest.param("post", "/api/query",
+                     {"content": "query=test",
+                      "headers": {"Content-Type": "application/x-www-form-urlencoded"}},
+                     422, id="invalid_content_type"),
+        pytest.param("post", "/api/query", {}, 422, id="missing_content_type"),
+        # GET on POST endpoint, POST on GET endpoint
+        pytest.param("get", "/api/query", {}, 405, id="get_on_post_endpoint"),
+        pytest.param("post", "/api/courses", {}, 405, id="post_on_get_endpoint"),
+    ])
+    def test_error_cases(self, test_client: TestClient, method, path, kwargs, status):
+        """Test requests the API rejects with a client error status."""
+        assert test_client.request(method, path, **kwargs).status_code == status
     
     def test_options_request(self, test_client: TestClient):
         """Test OPTIONS request for CORS preflight."""
@@ -186,45 +238,6 @@ class TestRequestValidation:
         assert response.status_code == 200
 
 
-@pytest.mark.api
-class TestResponseFormat:
-    """Test response format and structure."""
-    
-    def test_query_response_format(self, test_client: TestClient):
-        """Test that query response matches expected format."""
-        response = test_client.post(
-            "/api/query",
-            json={"query": "test query"}
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        
-        # Check required fields exist
-        required_fields = {"answer", "sources", "session_id"}
-        assert set(data.keys()) == required_fields
-        
-        # Check field types
-        assert isinstance(data["answer"], str)
-        assert isinstance(data["sources"], list)
-        assert isinstance(data["session_id"], str)
-    
-    def test_courses_response_format(self, test_client: TestClient):
-        """Test that courses response matches expected format."""
-        response = test_client.get("/api/courses")
-        
-        assert response.status_code == 200
-        data = response.json()
-        
-        # Check required fields exist
-        required_fields = {"total_courses", "course_titles"}
-        assert set(data.keys()) == required_fields
-        
-        # Check field types
-        assert isinstance(data["total_courses"], int)
-        assert isinstance(data["course_titles"], list)
-
-
 @pytest.mark.api 
 class TestErrorHandling:
     """Test error handling scenarios."""
@@ -235,23 +248,12 @@ class TestErrorHandling:
         
         assert response.status_code == 404
     
-    def test_wrong_http_method(self, test_client: TestClient):
-        """Test using wrong HTTP method on existing endpoint."""
-        # GET on POST endpoint
-        response = test_client.get("/api/query")
-        assert response.status_code == 405
-        
-        # POST on GET endpoint  
-        response = test_client.post("/api/courses")
-        assert response.status_code == 405
-    
     def test_large_payload(self, test_client: TestClient):
         """Test handling of large request payload."""
-        large_query = "x" * 10000  # 10KB query
-        
         response = test_client.post(
             "/api/query",
-            json={"query": large_query}
+            content=LARGE_QUERY_BODY,
+            headers=JSON_HEADERS
         )
         
         # Should handle large queries gracefully
@@ -0,0 +1,85 @@
+"""
+Tests for the response caches.
+"""
+
+from unittest.mock import patch
+
+from response_cache import SemanticResponseCache
+
+VECTORS = {"What is ML?": [1.0, 0.0], "Explain machine learning": [0.99, 0.05]}
+
+
+def embed(texts):
+    """Fake embedding function looking up fixed vectors"""
+    return [VECTORS[t] for t in texts]
+
+
+def test_semantic_cache_entries_expire():
+    """Test semantic cache entries stop matching once older than the TTL"""
+    cache = SemanticResponseCache(embed, ttl_seconds=60)
+    clock = [1000.0]
+
+    with patch("response_cache.time.monotonic", side_effect=lambda: clock[0]):
+        cache.add(cache.encode("What is ML?"), "ML answer.")
+
+        clock[0] += 30
+        assert cache.lookup(cache.encode("Explain machine learning")) == "ML answer."
+
+        clock[0] += 31
+        assert cache.lookup(cache.encode("Explain machine learning")) is None
+
+    assert len(cache) == 0
+
+
+def test_semantic_cache_partitions():
+    """Test entries only match lookups from the partition they were added to"""
+    cache = SemanticResponseCache(embed)
+    query_vector = cache.encode("What is ML?")
+    cache.add(query_vector, "Answer with tools.", partition="tools-a")
+
+    assert cache.lookup(query_vector, partition="tools-a") == "Answer with tools."
+    assert cache.lookup(query_vector, partition="tools-b") is None
+    assert cache.lookup(query_vector) is None
+
+
+def test_semantic_cache_save_and_load(tmp_path):
+    """Test a saved semantic cache serves the same matches after loading"""
+    cache_file = str(tmp_path / "cache.json")
+
+    cache = SemanticResponseCache(embed)
+    cache.add(cache.encode("What is ML?"), "ML answer.")
+    cache.save(cache_file)
+
+    restored = SemanticResponseCache(embed)
+    restored.load(cache_file)
+    restored.load(str(tmp_path / "missing.json"))  # Missing files are ignored
+
+    assert len(restored) == 1
+    assert restored.lookup(restored.encode("Explain machine learning")) == "ML answer."
+
+
+def test_semantic_cache_load_keeps_partitions_and_ages(tmp_path):
+    """Test a reloaded cache keeps partitions and entries age while on disk"""
+    cache_file = str(tmp_path / "cache.json")
+    clock = [1000.0]
+    wall_clock = [5000.0]
+
+    with (
+        patch("response_cache.time.monotonic", side_effect=lambda: clock[0]),
+        patch("response_cache.time.time", side_effect=lambda: wall_clock[0]),
+    ):
+        cache = SemanticResponseCache(embed, ttl_seconds=60)
+        cache.add(cache.encode("What is ML?"), "ML answer.", partition="tools-a")
+        clock[0] += 20
+        cache.save(cache_file)
+
+        # Restored in a new process 30 seconds later: 50 of the 60 seconds used
+        clock[0] = 0.0
+        wall_clock[0] += 30
+        restored = SemanticResponseCache(embed, ttl_seconds=60)
+        restored.load(cache_file)
+        query_vector = restored.encode("Explain machine learning")
+        assert restored.lookup(query_vector, partition="tools-a") == "ML answer."
+
+        clock[0] += 11
+        assert restored.lookup(query_vector, partition="tools-a") is None
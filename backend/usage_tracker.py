@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+class UsageTracker:
+    """Records Claude API token usage and enforces optional per-minute rate limits"""
+
+    WINDOW_SECONDS = 60.0
+
+    def __init__(self, max_rpm: Optional[int] = None, max_tpm: Optional[int] = None):
+        self.max_rpm = max_rpm
+        self.max_tpm = max_tpm
+        self._requests: Deque[float] = deque()  # Start times of recent requests
+        self._tokens: Deque[Tuple[float, int]] = deque()  # Recent (time, tokens)
+        self._lock = threading.Lock()
+        self.totals: Dict[str, int] = {
+            "requests": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+        }
+
+    @property
+    def limited(self) -> bool:
+        """Whether any rate limit is configured"""
+        return bool(self.max_rpm or self.max_tpm)
+
+    def record(self, usage: Any, rate_limited: bool = True):
+        """
+        Record the usage block of an API response.
+
+        Args:
+            usage: The response's usage object (may be None)
+            rate_limited: Whether the request counts against the per-minute
+                limits; Message Batches requests have limits of their own
+        """
+        if usage is None:
+            return
+
+        counts = {
+            key: getattr(usage, key, 0) or 0 for key in self.totals if key != "requests"
+        }
+        with self._lock:
+            self.totals["requests"] += 1
+            for key, value in counts.items():
+                self.totals[key] += value
+
+            # The window only feeds rate limiting; unlimited trackers keep totals
+            if not self.limited or not rate_limited:
+                return
+
+            now = time.monotonic()
+            self._prune(now)
+            self._tokens.append(
+                (
+                    now,
+                    counts["input_tokens"]
+                    + counts["cache_creation_input_tokens"]
+                    + counts["output_tokens"],
+                )
+            )
+
+    def acquire(self, est_input_tokens: int = 0, est_output_tokens: int = 0):
+        """
+        Block until a request of the estimated size fits in the rate limits.
+
+        Token accounting uses recorded usage, so concurrent callers can
+        overshoot the token limit slightly; the request limit is exact.
+
+        Args:
+            est_input_tokens: Estimated input tokens for the request
+            est_output_tokens: Estimated output tokens for the request
+        """
+        if not self.limited:
+            return
+
+        estimate = est_input_tokens + est_output_tokens
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._prune(now)
+
+                used_tokens = sum(tokens for _, tokens in self._tokens)
+                rpm_ok = not self.max_rpm or len(self._requests) < self.max_rpm
+                # An empty window always admits, so oversized requests can't stall
+                tpm_ok = (
+                    not self.max_tpm
+                    or not self._tokens
+                    or used_tokens + estimate <= self.max_tpm
+                )
+                if rpm_ok and tpm_ok:
+                    self._requests.append(now)
+                    return
+
+                # Sleep until the oldest entry blocking us leaves the window
+                oldest = min(
+                    self._requests[0] if not rpm_ok else now,
+                    self._tokens[0][0] if not tpm_ok else now,
+                )
+                wait = max(oldest + self.WINDOW_SECONDS - now, 0.01)
+
+            time.sleep(wait)
+
+    def _prune(self, now: float):
+        """Drop entries older than the window; the caller must hold the lock"""
+        cutoff = now - self.WINDOW_SECONDS
+        while self._requests and self._requests[0] <= cutoff:
+            self._requests.popleft()
+        while self._tokens and self._tokens[0][0] <= cutoff:
+            self._tokens.popleft()
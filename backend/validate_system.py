@@ -1,16 +1,102 @@
 #!/usr/bin/env python3
 """
 System validation script to test various query scenarios and identify issues.
+
+Pass --batch to answer the query scenarios through one Message Batches API
+request instead of one synchronous call each.
+
+Successful answers are kept in a semantic cache on disk. Pass --use-cache to
+reuse them for the same or near-identical queries instead of asking again;
+reused answers are reported as cached and not counted as passing.
+
+The query scenarios run concurrently on a small thread pool; pass
+--sequential to run one query at a time.
 """
 
+import json
+import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 from config import config
 from rag_system import RAGSystem
+from response_cache import SemanticResponseCache
+
+CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "validation_cache.json"
+)
+CACHE_THRESHOLD = 0.97
+QUERY_WORKERS = 8  # Scenario queries answered at once (API rate limits still apply)
+
+# Failure phrases found in a response, all in one case-insensitive scan
+_ISSUE_RE = re.compile(r"query failed|search error", re.IGNORECASE)
+
+# (query, test name) pairs exercised by test_query_scenarios
+TEST_QUERIES = [
+    # Course content queries
+    ("What is machine learning?", "general_ml"),
+    ("What courses are available about Anthropic?", "anthropic_courses"),
+    ("Tell me about MCP", "mcp_specific"),
+    ("What is prompt compression?", "prompt_compression"),
+    ("How do I build AI apps?", "ai_apps"),
+    # Course outline queries
+    ("What's covered in the Anthropic course?", "course_outline"),
+    ("Show me the outline for the MCP course", "mcp_outline"),
+    # Edge cases
+    ("", "empty_query"),
+    ("xyzabc123nonexistent", "nonsense_query"),
+    ("What is the weather today?", "unrelated_query"),
+]
+
+
+class ValidationCache:
+    """Disk-backed semantic cache of validation answers and their sources"""
+
+    def __init__(self, embedding_function, path: str = CACHE_PATH):
+        self.path = path
+        self._cache = SemanticResponseCache(
+            embedding_function, threshold=CACHE_THRESHOLD
+        )
 
+    def load(self):
+        self._cache.load(self.path)
+
+    def save(self):
+        self._cache.save(self.path)
+
+    def lookup(self, query: str) -> Optional[Tuple[str, List]]:
+        """Return the stored (response, sources) for a similar query, if any"""
+        hit = self._cache.lookup(self._cache.encode(query))
+        if hit is None:
+            return None
+        response, sources = json.loads(hit)
+        return response, sources
+
+    def store(self, query: str, response: str, sources: Optional[List]):
+        self._cache.add(self._cache.encode(query), json.dumps([response, sources]))
 
-def test_query_scenarios():
-    """Test various query scenarios that could cause failures"""
+
+def find_issues(response: str) -> List[str]:
+    """Describe what makes a query response look like a failure, if anything"""
+    issues = []
+    found = {match.lower() for match in _ISSUE_RE.findall(response)}
+
+    if "query failed" in found:
+        issues.append("Contains 'query failed'")
+
+    if len(response) < 10:
+        issues.append("Response too short")
+
+    if "search error" in found:
+        issues.append("Contains search error")
+
+    return issues
+
+
+def initialize_system() -> Optional[RAGSystem]:
+    """Build the RAG system shared by all checks, loading the docs if needed"""
 
     print("=== RAG System Validation ===\n")
 
@@ -20,7 +106,7 @@ def test_query_scenarios():
         print("✓ RAG System initialized successfully")
     except Exception as e:
         print(f"✗ RAG System initialization failed: {e}")
-        return False
+        return None
 
     # Check configuration
     print(f"✓ MAX_RESULTS: {config.MAX_RESULTS}")
@@ -35,70 +121,100 @@ def test_query_scenarios():
         courses, chunks = rag.add_course_folder("../docs", clear_existing=True)
         print(f"✓ Loaded {courses} courses with {chunks} chunks")
 
-    # Test various query scenarios
-    test_queries = [
-        # Course content queries
-        ("What is machine learning?", "general_ml"),
-        ("What courses are available about Anthropic?", "anthropic_courses"),
-        ("Tell me about MCP", "mcp_specific"),
-        ("What is prompt compression?", "prompt_compression"),
-        ("How do I build AI apps?", "ai_apps"),
-        # Course outline queries
-        ("What's covered in the Anthropic course?", "course_outline"),
-        ("Show me the outline for the MCP course", "mcp_outline"),
-        # Edge cases
-        ("", "empty_query"),
-        ("xyzabc123nonexistent", "nonsense_query"),
-        ("What is the weather today?", "unrelated_query"),
-    ]
+    return rag
+
+
+def test_query_scenarios(
+    rag: RAGSystem,
+    batch: bool = False,
+    use_cache: bool = False,
+    sequential: bool = False,
+):
+    """Test various query scenarios that could cause failures"""
 
     results = []
 
     print("\n=== Testing Query Scenarios ===")
 
-    for query, test_name in test_queries:
+    # Optionally reuse answers from earlier runs for near-identical queries;
+    # otherwise the cache is rebuilt from this run's answers
+    cache = ValidationCache(rag.vector_store.embedding_function)
+    cached: Dict[str, Tuple[str, List]] = {}
+    if use_cache:
+        cache.load()
+        for query, _ in TEST_QUERIES:
+            hit = cache.lookup(query) if query else None
+            if hit is not None:
+                cached[query] = hit
+    if cached:
+        print(f"\nReusing {len(cached)} cached answers, which are not re-verified")
+
+    # Answer all remaining non-empty queries up front in a single batch
+    batched: Dict[str, str] = {}
+    batch_error: Optional[Exception] = None
+    queries = [query for query, _ in TEST_QUERIES if query and query not in cached]
+    if batch and queries:
+        print(f"\nSubmitting {len(queries)} queries as one batch...")
+        try:
+            batched = dict(zip(queries, rag.query_batch(queries)))
+        except Exception as e:
+            batch_error = e
+
+    workers = 1 if sequential else QUERY_WORKERS
+
+    def answer(query: str) -> Tuple[str, Optional[List]]:
+        if not query:  # Empty query test
+            return "Empty query - skipping", []
+        if query in cached:
+            return cached[query]
+        if batch_error is not None:
+            raise batch_error
+        if batch:
+            return batched[query], None  # Not tracked per query in batch mode
+        return rag.query(query)
+
+    # The queries are independent, so answer them all at once and report in order
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        answers = [executor.submit(answer, query) for query, _ in TEST_QUERIES]
+
+    for (query, test_name), future in zip(TEST_QUERIES, answers):
         print(f"\nTest: {test_name}")
         print(f"Query: '{query}'")
 
         try:
-            if not query:  # Empty query test
-                response = "Empty query - skipping"
-                sources = []
-            else:
-                response, sources = rag.query(query)
-
-            # Analyze result
-            success = True
-            issues = []
-
-            if "query failed" in response.lower():
-                success = False
-                issues.append("Contains 'query failed'")
+            response, sources = future.result()
 
-            if len(response) < 10:
-                success = False
-                issues.append("Response too short")
+            # A cached answer passed on an earlier run, not against today's system
+            if query in cached:
+                print("↺ Cached answer, not verified")
+                print(f"↺ Preview: {response[:100]}...")
+                results.append({"test_name": test_name, "query": query, "cached": True})
+                continue
 
-            if "error" in response.lower() and "search error" in response.lower():
-                success = False
-                issues.append("Contains search error")
+            # Analyze result
+            issues = find_issues(response)
+            success = not issues
 
             # Print result
             status = "✓" if success else "✗"
             print(f"{status} Response length: {len(response)}")
-            print(f"{status} Sources: {len(sources)}")
+            print(f"{status} Sources: {'n/a' if sources is None else len(sources)}")
             print(f"{status} Preview: {response[:100]}...")
 
             if issues:
                 print(f"  Issues: {', '.join(issues)}")
 
+            # Only keep good answers, so a fix is never masked by a stale failure
+            if success and query:
+                cache.store(query, response, sources)
+
             results.append(
                 {
                     "test_name": test_name,
                     "query": query,
                     "success": success,
                     "response_length": len(response),
-                    "source_count": len(sources),
+                    "source_count": None if sources is None else len(sources),
                     "issues": issues,
                 }
             )
@@ -114,14 +230,22 @@ def test_query_scenarios():
                 }
             )
 
-    # Summary
+    try:
+        cache.save()
+    except OSError as e:
+        print(f"\n✗ Could not save validation cache: {e}")
+
+    # Summary; cached answers were not checked, so they neither pass nor fail
     print("\n=== Test Summary ===")
-    successful = sum(1 for r in results if r.get("success", False))
-    total = len(results)
+    verified = [r for r in results if not r.get("cached", False)]
+    successful = sum(1 for r in verified if r.get("success", False))
+    total = len(verified)
 
     print(f"Successful tests: {successful}/{total}")
+    if len(verified) < len(results):
+        print(f"Cached, not verified: {len(results) - len(verified)}")
 
-    failed_tests = [r for r in results if not r.get("success", False)]
+    failed_tests = [r for r in verified if not r.get("success", False)]
     if failed_tests:
         print("\nFailed tests:")
         for test in failed_tests:
@@ -134,13 +258,11 @@ def test_query_scenarios():
     return successful == total
 
 
-def test_direct_tool_calls():
+def test_direct_tool_calls(rag: RAGSystem):
     """Test direct tool calls to isolate tool issues"""
 
     print("\n=== Direct Tool Testing ===")
 
-    rag = RAGSystem(config)
-
     # Test search tool directly
     print("Testing CourseSearchTool...")
     try:
@@ -183,9 +305,19 @@ def test_direct_tool_calls():
 if __name__ == "__main__":
     print("Starting RAG system validation...\n")
 
+    # Both checks share one system, so models and data load only once
+    rag = initialize_system()
+    if rag is None:
+        sys.exit(1)
+
     # Run tests
-    tools_ok = test_direct_tool_calls()
-    queries_ok = test_query_scenarios()
+    tools_ok = test_direct_tool_calls(rag)
+    queries_ok = test_query_scenarios(
+        rag,
+        batch="--batch" in sys.argv[1:],
+        use_cache="--use-cache" in sys.argv[1:],
+        sequential="--sequential" in sys.argv[1:],
+    )
 
     print("\n=== Final Results ===")
     print(f"Direct tools: {'✓ PASS' if tools_ok else '✗ FAIL'}")
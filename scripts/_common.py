@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""Paths, resolved once at import, and the tool runner shared by the quality scripts."""
+
+import os
+from pathlib import Path
+from typing import Callable
+
+# Set PROJECT_ROOT to skip probing, e.g. in container builds with a known layout
+PROJECT_ROOT = Path(
+    os.environ.get("PROJECT_ROOT") or Path(__file__).resolve().parent.parent
+)
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+
+def run_tool(
+    tool_main: Callable, args: list[str], description: str, success: str = "passed"
+) -> bool:
+    """Run a tool's CLI entry point in-process and return True if successful."""
+    print(f"Running {description}...")
+    try:
+        exit_code = tool_main(args)
+    except SystemExit as e:
+        exit_code = e.code
+    if exit_code:
+        print(f"[ERROR] {description} failed")
+        return False
+    print(f"[SUCCESS] {description} {success}")
+    return True
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Helper to limit the quality checks to Python files changed on this branch."""
+
+import subprocess
+from pathlib import Path
+from typing import Optional
+
+BASE_REFS = ["origin/main", "main"]
+
+
+def git(project_root: Path, *args: str) -> list[str]:
+    """Run a git command in the project and return its output lines."""
+    output = subprocess.check_output(
+        ["git", "-C", str(project_root), *args], text=True, stderr=subprocess.DEVNULL
+    )
+    return [line for line in output.splitlines() if line]
+
+
+def changed_python_files(project_root: Path, within: Path) -> Optional[list[str]]:
+    """
+    List Python files under within that differ from the main branch.
+
+    Covers commits since the branch left main, staged and unstaged edits,
+    and new untracked files. Returns None when the whole tree should be
+    checked instead: outside git, on main itself, with no base ref, or
+    when nothing has changed.
+    """
+    try:
+        if git(project_root, "rev-parse", "--abbrev-ref", "HEAD") == ["main"]:
+            return None
+
+        for base_ref in BASE_REFS:
+            try:
+                git(project_root, "rev-parse", "--verify", "--quiet", base_ref)
+                break
+            except subprocess.CalledProcessError:
+                continue
+        else:
+            return None
+
+        diff = ["diff", "--name-only", "--diff-filter=ACMR"]
+        names = set(git(project_root, *diff, f"{base_ref}...HEAD", "--", "*.py"))
+        names.update(git(project_root, *diff, "--", "*.py"))
+        names.update(git(project_root, *diff, "--cached", "--", "*.py"))
+        names.update(
+            git(project_root, "ls-files", "--others", "--exclude-standard", "*.py")
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    within = within.resolve()
+    files = []
+    for name in sorted(names):
+        path = (project_root / name).resolve()
+        if path.is_file() and path.is_relative_to(within):
+            files.append(str(path))
+    return files or None
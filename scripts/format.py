@@ -1,41 +1,33 @@
 #!/usr/bin/env python3
 """Script to format Python code using black and isort."""
 
-import subprocess
 import sys
-from pathlib import Path
 
-
-def run_command(command: list[str], description: str) -> bool:
-    """Run a command and return True if successful."""
-    print(f"Running {description}...")
-    try:
-        result = subprocess.run(command, check=True, capture_output=True, text=True)
-        print(f"[SUCCESS] {description} completed successfully")
-        if result.stdout:
-            print(result.stdout)
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"[ERROR] {description} failed")
-        print(f"Error: {e.stderr}")
-        return False
+from _common import PROJECT_ROOT, run_tool
+from black import main as black_main
+from changed_files import changed_python_files
+from isort.main import main as isort_main
 
 
 def main():
     """Format the codebase using black and isort."""
     print("[FORMAT] Formatting codebase...")
 
-    # Get the project root directory
-    project_root = Path(__file__).parent.parent
+    # Only touch files changed on this branch, or the whole project otherwise
+    targets = changed_python_files(PROJECT_ROOT, PROJECT_ROOT) or [str(PROJECT_ROOT)]
 
-    # Run isort to organize imports
-    isort_success = run_command(
-        ["uv", "run", "isort", str(project_root)], "import sorting with isort"
+    # Run isort to organize imports, spreading files over all CPUs as black does.
+    # The two tools rewrite the same files, so they still run one after another
+    isort_success = run_tool(
+        isort_main,
+        ["--jobs", "-1", *targets],
+        "import sorting with isort",
+        "completed successfully",
     )
 
     # Run black to format code
-    black_success = run_command(
-        ["uv", "run", "black", str(project_root)], "code formatting with black"
+    black_success = run_tool(
+        black_main, targets, "code formatting with black", "completed successfully"
     )
 
     if isort_success and black_success:
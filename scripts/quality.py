@@ -1,39 +1,32 @@
 #!/usr/bin/env python3
 """Master script to run all code quality checks."""
 
-import subprocess
 import sys
-from pathlib import Path
 
-
-def run_script(script_name: str) -> bool:
-    """Run a quality check script and return True if successful."""
-    script_path = Path(__file__).parent / f"{script_name}.py"
-    try:
-        result = subprocess.run([sys.executable, str(script_path)], check=True)
-        return True
-    except subprocess.CalledProcessError:
-        return False
+from format import main as format_main
+from lint import main as lint_main
+from typecheck import main as typecheck_main
 
 
 def main():
-    """Run all code quality checks in sequence."""
+    """Run all code quality checks in sequence, in this one process."""
     print("[QUALITY] Running comprehensive code quality checks...\n")
 
+    # Formatting rewrites files, so it runs before the checks that read them
     checks = [
-        ("format", "Code formatting"),
-        ("lint", "Linting"),
-        ("typecheck", "Type checking"),
+        (format_main, "Code formatting"),
+        (lint_main, "Linting"),
+        (typecheck_main, "Type checking"),
     ]
 
     failed_checks = []
 
-    for script, description in checks:
+    for check_main, description in checks:
         print(f"\n{'='*50}")
         print(f"{description.upper()}")
         print(f"{'='*50}")
 
-        if not run_script(script):
+        if check_main() != 0:
             failed_checks.append(description)
 
     print(f"\n{'='*50}")
@@ -1,41 +1,35 @@
 #!/usr/bin/env python3
 """Script to run type checking using mypy."""
 
-import subprocess
 import sys
-from pathlib import Path
-
-
-def run_command(command: list[str], description: str) -> bool:
-    """Run a command and return True if successful."""
-    print(f"Running {description}...")
-    try:
-        result = subprocess.run(command, check=True, capture_output=True, text=True)
-        print(f"[SUCCESS] {description} passed")
-        if result.stdout:
-            print(result.stdout)
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"[ERROR] {description} failed")
-        if e.stdout:
-            print(e.stdout)
-        if e.stderr:
-            print(e.stderr)
-        return False
+
+from _common import BACKEND_DIR, PROJECT_ROOT, run_tool
+from changed_files import changed_python_files
+from mypy.main import main as mypy_cli
+
+
+def mypy_main(args: list[str]) -> None:
+    """Run mypy's command line entry point, streaming its report as it goes."""
+    # clean_exit makes mypy raise SystemExit instead of ending this process
+    mypy_cli(args=args, clean_exit=True)
 
 
 def main():
     """Run type checking on the codebase."""
     print("[TYPECHECK] Running type checks...")
 
-    # Get the project root directory
-    project_root = Path(__file__).parent.parent
-    backend_dir = project_root / "backend"
+    # Run mypy on changed backend files, without reporting on what they import
+    changed = changed_python_files(PROJECT_ROOT, BACKEND_DIR)
+    if changed:
+        targets = ["--follow-imports=silent", *changed]
+    else:
+        targets = [str(BACKEND_DIR)]
 
-    # Run mypy for type checking on backend directory
-    mypy_success = run_command(
-        ["uv", "run", "mypy", str(backend_dir)], "type checking with mypy"
-    )
+    # Keep the incremental cache in one SQLite file at the project root, so it
+    # is found from any working directory and is easy to cache between CI runs
+    cache_dir = PROJECT_ROOT / ".mypy_cache"
+    options = ["--cache-dir", str(cache_dir), "--sqlite-cache"]
+    mypy_success = run_tool(mypy_main, [*options, *targets], "type checking with mypy")
 
     if mypy_success:
         print("[SUCCESS] All type checks passed!")